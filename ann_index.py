@@ -0,0 +1,167 @@
+import numpy as np
+
+
+class IVFIndex:
+    """Approximate nearest-neighbour index with a k-means coarse quantizer.
+
+    Vectors are grouped into ``n_lists`` clusters (inverted lists). A query
+    only scans the ``n_probe`` lists whose centroids are closest to it, so its
+    cost is roughly ``n * n_probe / n_lists`` instead of ``n``. Raising
+    ``n_probe`` trades speed for recall; ``n_probe == n_lists`` is exact.
+
+    ``metric`` is ``'euclidean'`` (scores are distances, smaller is closer,
+    matching the knn model) or ``'cosine'`` (scores are similarities).
+    """
+
+    def __init__(self, centroids, list_ptr, list_ids, vectors, metric='euclidean', n_probe=8):
+        if metric not in ('euclidean', 'cosine'):
+            raise ValueError(f"Unsupported metric: {metric}")
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.list_ptr = np.asarray(list_ptr, dtype=np.int64)
+        self.list_ids = np.asarray(list_ids, dtype=np.int64)
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.metric = metric
+        self.n_probe = int(n_probe)
+        self.sq_norms = np.einsum('ij,ij->i', self.vectors, self.vectors)
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    @property
+    def n_rows(self):
+        return len(self.list_ids)
+
+    @classmethod
+    def build(cls, features, n_lists=None, metric='euclidean', n_probe=8, n_iter=20,
+              train_size=50000, seed=0):
+        """Cluster ``features`` with k-means and build the inverted lists.
+
+        ``n_lists`` defaults to about sqrt(n). Centroids are trained on a
+        sample of at most ``train_size`` rows.
+        """
+        rng = np.random.default_rng(seed)
+        vectors = _prepare(features, metric)
+        n = len(vectors)
+        n_lists = min(n_lists or max(1, int(np.sqrt(n))), n)
+
+        sample = vectors[rng.choice(n, size=min(train_size, n), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            assignment = _nearest_centroid(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=n_lists)
+            # Empty clusters keep their previous centroid
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+        if metric == 'cosine':
+            # Spherical centroids so the coarse search can use inner products
+            centroids = _prepare(centroids, metric)
+
+        assignment = _nearest_centroid(vectors, centroids)
+        order = np.argsort(assignment, kind='stable')
+        list_ptr = np.zeros(n_lists + 1, dtype=np.int64)
+        list_ptr[1:] = np.cumsum(np.bincount(assignment, minlength=n_lists))
+        return cls(centroids, list_ptr, order, vectors[order], metric=metric, n_probe=n_probe)
+
+    def search(self, queries, k, n_probe=None, exclude=None):
+        """Return (indices, scores) arrays of shape (n_queries, k), best first.
+
+        ``exclude`` optionally gives one row id per query to leave out (the
+        query game itself). Rows are padded with -1 / nan when fewer than k
+        candidates are found in the probed lists.
+        """
+        queries = _prepare(queries, self.metric)
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        exclude = None if exclude is None else np.atleast_1d(exclude)
+
+        if self.metric == 'cosine':
+            coarse = queries @ self.centroids.T
+        else:
+            coarse = -_squared_distances(queries, self.centroids)
+        probes = np.argsort(-coarse, axis=1)[:, :n_probe]
+
+        indices = np.full((len(queries), k), -1, dtype=np.int64)
+        scores = np.full((len(queries), k), np.nan, dtype=np.float64)
+        for q, query in enumerate(queries):
+            rows = np.concatenate([np.arange(self.list_ptr[l], self.list_ptr[l + 1]) for l in probes[q]])
+            if exclude is not None:
+                rows = rows[self.list_ids[rows] != exclude[q]]
+            if not len(rows):
+                continue
+
+            if self.metric == 'cosine':
+                candidate_scores = self.vectors[rows] @ query
+            else:
+                candidate_scores = -(self.sq_norms[rows] - 2 * (self.vectors[rows] @ query) + query @ query)
+
+            kk = min(k, len(rows))
+            best = np.argpartition(-candidate_scores, kk - 1)[:kk] if kk < len(rows) else np.arange(len(rows))
+            best = best[np.argsort(-candidate_scores[best], kind='stable')]
+            indices[q, :kk] = self.list_ids[rows[best]]
+            if self.metric == 'cosine':
+                scores[q, :kk] = candidate_scores[best]
+            else:
+                scores[q, :kk] = np.sqrt(np.maximum(-candidate_scores[best], 0))
+        return indices, scores
+
+    def add(self, features):
+        """Index with new rows appended (ids continue from ``n_rows``).
+
+        New vectors are filed into their nearest existing list; centroids are
+        not retrained, so rebuild the index once the catalog has drifted.
+        """
+        vectors = _prepare(features, self.metric)
+        ids = np.arange(self.n_rows, self.n_rows + len(vectors))
+        assignment = np.concatenate([self._assignment(), _nearest_centroid(vectors, self.centroids)])
+        return self._regroup(assignment, np.concatenate([self.list_ids, ids]), np.vstack([self.vectors, vectors]))
+
+    def remove(self, keep):
+        """Index without the rows where ``keep`` is False, with ids renumbered"""
+        keep = np.asarray(keep, dtype=bool)
+        kept = keep[self.list_ids]
+        new_ids = np.cumsum(keep) - 1
+        return self._regroup(self._assignment()[kept], new_ids[self.list_ids[kept]], self.vectors[kept])
+
+    def _assignment(self):
+        """List number of every stored vector"""
+        return np.repeat(np.arange(self.n_lists), np.diff(self.list_ptr))
+
+    def _regroup(self, assignment, ids, vectors):
+        order = np.argsort(assignment, kind='stable')
+        list_ptr = np.zeros(self.n_lists + 1, dtype=np.int64)
+        list_ptr[1:] = np.cumsum(np.bincount(assignment, minlength=self.n_lists))
+        return type(self)(self.centroids, list_ptr, ids[order], vectors[order], metric=self.metric,
+                          n_probe=self.n_probe)
+
+    @classmethod
+    def load(cls, file):
+        """Load an index written by save (path or file-like object)"""
+        with np.load(file) as arrays:
+            return cls(arrays['centroids'], arrays['list_ptr'], arrays['list_ids'], arrays['vectors'],
+                       metric=str(arrays['metric']), n_probe=int(arrays['n_probe']))
+
+    def save(self, file):
+        np.savez(file, centroids=self.centroids, list_ptr=self.list_ptr, list_ids=self.list_ids,
+                 vectors=self.vectors, metric=np.array(self.metric), n_probe=np.array(self.n_probe))
+
+
+def _prepare(vectors, metric):
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    if metric == 'cosine':
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.maximum(norms, np.finfo(np.float32).tiny)
+    return vectors
+
+
+def _squared_distances(a, b):
+    return (np.einsum('ij,ij->i', a, a)[:, None] - 2 * (a @ b.T) + np.einsum('ij,ij->i', b, b)[None, :])
+
+
+def _nearest_centroid(vectors, centroids, block_size=8192):
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), block_size):
+        block = vectors[start:start + block_size]
+        assignment[start:start + block_size] = np.argmin(_squared_distances(block, centroids), axis=1)
+    return assignment
@@ -3,6 +3,15 @@ st.set_page_config(page_icon=":material/robot_2:",layout="wide",page_title="Tech
 from streamlit_navigation_bar import st_navbar
 import pages as pg
 from pages.security_login import update_visitor_count
+from model_loader import startup
+from metrics import metrics
+
+# Load the recommendation models in the background so Home, Tutorial and About
+# render right away; the Recommend page waits for them on first use
+try:
+    startup.start(st.secrets["gcp_service_account"])
+except Exception:
+    pass  # Missing credentials are reported by the Recommend page
 st.logo("logo.gif")
 st.markdown("""
             <style>
@@ -95,15 +104,38 @@ if 'display_count' not in st.session_state:
 if st.session_state.first_access:
     st.session_state.visitor_count = update_visitor_count()
 
-if st.session_state.display_count:
+if st.session_state.display_count and st.session_state.visitor_count is not None:
     st.toast(f"Visitor Count : {st.session_state.visitor_count}")
     st.session_state.display_count = False
 
 if st.sidebar.button("Site Stats",use_container_width=True):
     visitor_count = update_visitor_count()
+    if visitor_count is None:
+        visitor_count = "loading..."
     st.sidebar.subheader(f"Total Visitors : {visitor_count}")
     st.toast(f"Total visitors: {visitor_count}")
 
+    # Rolling latencies of the hot paths, so a slow click can be traced to
+    # the model, pandas/plotly or MySQL
+    snapshot = metrics.snapshot()
+    latency_rows = [
+        {"Span": name + "".join(f" {key}={value}" for key, value in labels), "Calls": stats['count'],
+         "p50 ms": round(stats['p50_ms'], 2), "p95 ms": round(stats['p95_ms'], 2), "p99 ms": round(stats['p99_ms'], 2)}
+        for (name, labels), stats in sorted(snapshot['histograms'].items())
+    ]
+    if latency_rows:
+        st.sidebar.dataframe(latency_rows, hide_index=True, use_container_width=True)
+    for (name, labels), value in sorted(snapshot['counters'].items()) + sorted(snapshot['gauges'].items()):
+        if value is not None:
+            st.sidebar.caption(f"{name}{''.join(f' {key}={label}' for key, label in labels)}: "
+                               f"{round(value, 3) if isinstance(value, float) else value}")
+    st.sidebar.download_button("Export metrics (Prometheus)", metrics.prometheus(), file_name="metrics.prom",
+                               mime="text/plain", use_container_width=True, on_click="ignore")
+
+model_status = {"idle": "not loaded", "loading": "loading...", "ready": "ready", "failed": "failed to load, retrying..."}
+model_version = f" (version {startup.version})" if startup.state == 'ready' else ""
+st.sidebar.caption(f"Recommendation models: {model_status[startup.state]}{model_version}")
+
 def open_link(url):
     st.components.v1.html(f'<script>window.open("{url}", "_blank");</script>', height=0)
 
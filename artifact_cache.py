@@ -0,0 +1,90 @@
+import base64
+import hashlib
+import os
+import tempfile
+import threading
+
+# Default location and size bound of the on-disk artifact cache
+DEFAULT_CACHE_DIR = os.environ.get('ARTIFACT_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'game_recommender'))
+DEFAULT_MAX_BYTES = int(os.environ.get('ARTIFACT_CACHE_MAX_BYTES', 4 * 1024 ** 3))
+
+
+class ArtifactCache:
+    """Content-addressed local copies of GCS blobs.
+
+    Files are keyed by the blob's md5 (or its generation when GCS has no md5),
+    so an unchanged artifact is reused across restarts after one metadata
+    request, and a new upload is downloaded under a new key. The cache is kept
+    under ``max_bytes`` by evicting the least recently used files.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(blob):
+        """Cache key for a blob whose metadata has been loaded"""
+        if blob.md5_hash:
+            digest = base64.b64decode(blob.md5_hash).hex()
+        else:
+            name = f"{blob.bucket.name}/{blob.name}@{blob.generation}"
+            digest = 'g' + hashlib.md5(name.encode()).hexdigest()
+        return digest + os.path.splitext(blob.name)[1]
+
+    def fetch(self, blob, reload=True):
+        """Return a local path holding the blob's current contents.
+
+        Pass ``reload=False`` when the blob's metadata was just loaded.
+        """
+        if reload:
+            blob.reload()
+        path = os.path.join(self.cache_dir, self.key(blob))
+
+        if os.path.exists(path) and os.path.getsize(path) == blob.size:
+            # Hit: refresh the timestamp eviction orders by
+            os.utime(path)
+            return path
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.part')
+        os.close(fd)
+        try:
+            blob.download_to_filename(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self.evict(keep=path)
+        return path
+
+    def read_bytes(self, blob):
+        with open(self.fetch(blob), 'rb') as f:
+            return f.read()
+
+    def evict(self, keep=None):
+        """Delete least recently used files until the cache fits in max_bytes"""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                path = os.path.join(self.cache_dir, name)
+                if name.endswith('.part') or not os.path.isfile(path):
+                    continue
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
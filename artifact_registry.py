@@ -0,0 +1,95 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from artifact_cache import ArtifactCache
+from metrics import metrics
+
+
+class ArtifactRegistry:
+    """Process-wide store of deserialized artifacts.
+
+    Each blob is downloaded and deserialized at most once per content version,
+    and every caller (knn and cosine recommenders, the backend, scripts) gets
+    the same object by reference. Entries are keyed by bucket, blob path and
+    the blob's content key, so a new upload is loaded as a new entry; the
+    entry for the previous upload is then dropped, and its object is freed
+    once nothing else still uses it.
+
+    A loader that turns a blob into something other than the usual object
+    (e.g. the shared-memory loaders of model_loader) passes a ``variant``
+    name, so its result is kept apart from the default entry for that blob.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache or ArtifactCache()
+        self._objects = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def load(self, bucket, blob_path, loader, variant=None):
+        """Return the loaded artifact, loading it on first use"""
+        return self._load_timed(bucket, blob_path, loader, variant)[0]
+
+    def _load_timed(self, bucket, blob_path, loader, variant=None):
+        start = time.perf_counter()
+        blob = bucket.blob(blob_path)
+        blob.reload()
+        key = (bucket.name, blob_path, variant, ArtifactCache.key(blob))
+
+        # One lock per artifact so concurrent callers wait for a single load
+        with self._key_lock(key):
+            if key in self._objects:
+                return self._objects[key], {'download': 0.0, 'load': 0.0, 'shared': True}
+
+            path = self.cache.fetch(blob, reload=False)
+            downloaded = time.perf_counter()
+            obj = loader(path)
+            self._objects[key] = obj
+            self._drop_superseded(key)
+            timing = {'download': downloaded - start, 'load': time.perf_counter() - downloaded, 'shared': False}
+            metrics.observe('artifact_download_seconds', timing['download'], artifact=blob_path)
+            metrics.observe('artifact_load_seconds', timing['load'], artifact=blob_path)
+            return obj, timing
+
+    def load_many(self, bucket, artifacts, max_workers=4):
+        """Load several artifacts concurrently.
+
+        ``artifacts`` maps a name to ``(blob_path, loader)`` or
+        ``(blob_path, loader, variant)`` where ``loader`` turns the cached
+        local path into an object. Each worker deserializes
+        its artifact as soon as it is downloaded, overlapping with the
+        remaining downloads. Returns ``(objects, timings)``.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {name: executor.submit(self._load_timed, bucket, *artifact)
+                       for name, artifact in artifacts.items()}
+            results = {name: future.result() for name, future in futures.items()}
+
+        objects = {name: obj for name, (obj, _) in results.items()}
+        timings = {name: timing for name, (_, timing) in results.items()}
+        return objects, timings
+
+    def _drop_superseded(self, key):
+        """Forget earlier versions of the blob that was just loaded"""
+        with self._lock:
+            for old_key in [k for k in list(self._objects) if k[:3] == key[:3] and k != key]:
+                self._objects.pop(old_key, None)
+                self._locks.pop(old_key, None)
+
+    def content_keys(self):
+        """Cache keys of the artifact versions currently held"""
+        with self._lock:
+            return {key[3] for key in self._objects}
+
+    def clear(self):
+        with self._lock:
+            self._objects.clear()
+            self._locks.clear()
+
+
+# Shared by every loader in the process
+registry = ArtifactRegistry()
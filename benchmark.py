@@ -0,0 +1,188 @@
+"""Reproducible micro-benchmarks of the recommendation hot paths.
+
+Runs headless (no Streamlit, no GCS) on synthetic 320-feature catalogs and
+times GameRecommender.recommend (knn and cosine), load_from_bytes, the
+feature encoding behind preprocess_user_input and the feature-query path of
+the Recommend page (encode + recommend_by_features). Results are written as
+JSON so runs from different commits can be compared.
+
+    python benchmark.py --sizes 10000 100000 1000000 --json bench.json
+    python benchmark.py --sizes 10000 --compare bench.json
+"""
+import argparse
+import io
+import json
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import NearestNeighbors
+
+from game_recommender import GameRecommender, normalize_rows
+from synthetic_catalog import make_catalog, make_encoder, make_user_inputs
+
+
+def timed(fn, repeats, warmup=1):
+    """Call fn repeatedly; returns summary statistics in milliseconds"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples = np.array(samples) * 1000
+    return {
+        'repeats': repeats,
+        'mean_ms': round(float(samples.mean()), 4),
+        'p50_ms': round(float(np.percentile(samples, 50)), 4),
+        'p99_ms': round(float(np.percentile(samples, 99)), 4),
+        'min_ms': round(float(samples.min()), 4),
+        'ops_per_s': round(1000 / float(samples.mean()), 1) if samples.mean() else None,
+    }
+
+
+def catalog_frame(catalog):
+    """The catalog as game_data_processed.pkl stores it: a DataFrame indexed by game name"""
+    return pd.DataFrame(catalog.features, index=pd.Index(catalog.names), columns=catalog.columns)
+
+
+def to_bytes(obj):
+    buffer = io.BytesIO()
+    joblib.dump(obj, buffer)
+    return buffer.getvalue()
+
+
+def bench_catalog(n_games, args):
+    """Run every benchmark on one synthetic catalog; returns result rows"""
+    catalog = make_catalog(n_games, seed=args.seed)
+    user_inputs = make_user_inputs(args.queries, seed=args.seed)
+    encoder = make_encoder(user_inputs)
+    rng = np.random.default_rng(args.seed)
+    seeds = [catalog.names[i] for i in rng.choice(n_games, size=min(args.queries, n_games), replace=False)]
+    dense = n_games <= args.max_dense
+
+    model = NearestNeighbors(metric='euclidean').fit(catalog.features)
+    similarity_matrix = None
+    if dense:
+        normalized = normalize_rows(catalog.features)
+        similarity_matrix = normalized @ normalized.T
+
+    recommenders = {}
+    for model_type in ('knn', 'cosine'):
+        rec = GameRecommender(model_type)
+        rec.load_from_objects(model, catalog, similarity_matrix=similarity_matrix)
+        # Time the engine itself, not the result cache
+        rec.result_cache = None
+        recommenders[model_type] = rec
+
+    rows = []
+
+    def record(name, stats, **extra):
+        rows.append({'benchmark': name, 'n_games': n_games, **extra, **stats})
+        print(f"{n_games:>9} {name:<36} p50={stats['p50_ms']:.3f}ms p99={stats['p99_ms']:.3f}ms "
+              f"{stats['ops_per_s']} ops/s")
+
+    # recommend: one seed per call, as the Streamlit page issues it
+    for model_type, rec in recommenders.items():
+        if model_type == 'cosine' and not dense:
+            continue
+        queries = iter(seeds * (args.repeats + 1))
+        record(f'recommend[{model_type}]', timed(lambda: rec.recommend(next(queries), args.k), args.repeats),
+               k=args.k)
+        record(f'recommend_many[{model_type}]', timed(lambda: rec.recommend_many(seeds, args.k), args.batch_repeats),
+               k=args.k, batch=len(seeds))
+
+    # load_from_bytes: unpickle the model and the processed DataFrame, convert
+    # the frame to a feature matrix and build the indexes, as at startup
+    model_bytes, data_bytes = to_bytes(model), to_bytes(catalog_frame(catalog))
+    record('load_from_bytes[knn]',
+           timed(lambda: GameRecommender('knn').load_from_bytes(model_bytes, data_bytes), args.load_repeats, warmup=0),
+           bytes=len(model_bytes) + len(data_bytes))
+    if dense:
+        matrix_bytes = to_bytes(similarity_matrix)
+        record('load_from_bytes[cosine]',
+               timed(lambda: GameRecommender('cosine').load_from_bytes(model_bytes, data_bytes, matrix_bytes),
+                     args.load_repeats, warmup=0),
+               bytes=len(model_bytes) + len(data_bytes) + len(matrix_bytes))
+        del matrix_bytes
+    del model_bytes, data_bytes
+
+    # preprocess_user_input delegates to the compiled FeatureEncoder
+    inputs = iter(user_inputs * (args.repeats + 1))
+    record('preprocess_user_input', timed(lambda: encoder.encode(next(inputs)), args.repeats))
+    record('preprocess_user_input[batch]', timed(lambda: encoder.encode_many(user_inputs), args.batch_repeats),
+           batch=len(user_inputs))
+
+    # Feature-query path of the Recommend page: encode the form, then search
+    for model_type, rec in recommenders.items():
+        inputs = iter(user_inputs * (args.repeats + 1))
+        record(f'feature_query[{model_type}]',
+               timed(lambda: rec.recommend_by_features(encoder.encode(next(inputs)), args.k), args.repeats),
+               k=args.k)
+    return rows
+
+
+def environment():
+    """Enough context to tell whether two result files are comparable"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+    }
+
+
+def compare(rows, baseline_path):
+    """Print p50 ratios against a previous run (>1 means slower now)"""
+    with open(baseline_path) as f:
+        baseline = {(row['benchmark'], row['n_games']): row for row in json.load(f)['results']}
+    print(f"\nCompared with {baseline_path}:")
+    for row in rows:
+        previous = baseline.get((row['benchmark'], row['n_games']))
+        if previous and previous['p50_ms']:
+            print(f"{row['n_games']:>9} {row['benchmark']:<36} {row['p50_ms'] / previous['p50_ms']:.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='*', default=[10000, 100000],
+                        help="Synthetic catalog sizes (up to 1000000)")
+    parser.add_argument('--k', type=int, default=10, help="Recommendations per query")
+    parser.add_argument('--queries', type=int, default=200, help="Distinct seed games and form inputs")
+    parser.add_argument('--repeats', type=int, default=200, help="Timed calls per single-query benchmark")
+    parser.add_argument('--batch-repeats', type=int, default=5, help="Timed calls per batched benchmark")
+    parser.add_argument('--load-repeats', type=int, default=3, help="Timed calls per load_from_bytes benchmark")
+    parser.add_argument('--max-dense', type=int, default=20000,
+                        help="Largest catalog for which the dense n x n cosine matrix is built")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="Write the results to this JSON file")
+    parser.add_argument('--compare', help="Previous JSON results to compare against")
+    args = parser.parse_args(argv)
+
+    rows = []
+    for n_games in args.sizes:
+        rows += bench_catalog(n_games, args)
+
+    if args.compare:
+        compare(rows, args.compare)
+    output = {'environment': environment(), 'config': vars(args), 'results': rows}
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(output, f, indent=2)
+    return output
+
+
+if __name__ == "__main__":
+    main()
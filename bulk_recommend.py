@@ -0,0 +1,216 @@
+"""Offline top-k recommendations for every game in the catalog.
+
+Splits the catalog into row blocks and searches them in parallel on a
+process pool, with the knn (euclidean) and cosine engines. Each engine's
+results are written as two columnar arrays in the output directory:
+
+    <engine>_indices.npy   int32 (n_games, k) catalog rows, best first
+    <engine>_scores.npy    float32 (n_games, k) distances (knn) or similarities (cosine)
+
+plus games.json (name and platform of every row). Blocks are written in
+place as they finish and recorded in progress.json, so an interrupted run
+continues where it stopped when started again with the same arguments.
+
+    python bulk_recommend.py --data models/game_data_processed.pkl --out bulk/ --k 20
+    python bulk_recommend.py --data models/game_features.npy --engines cosine --graph bulk/cosine_topk_graph.npz
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import joblib
+import numpy as np
+from sklearn.neighbors import NearestNeighbors
+
+from game_recommender import (NeighbourGraph, catalog_platforms, feature_matrix_from_frame, normalize_rows,
+                              open_feature_matrix, top_k)
+
+logger = logging.getLogger(__name__)
+
+ENGINES = ('knn', 'cosine')
+PROGRESS_FILE = 'progress.json'
+# Default size of one block's (block x n_games) score matrix, per worker
+BLOCK_BYTES = 256 * 2 ** 20
+
+# Per-worker state, set up once by _init_worker
+_worker = {}
+
+
+def load_catalog(args):
+    if args.data and args.data.endswith('.npy'):
+        return open_feature_matrix(args.data)
+    if args.data:
+        return feature_matrix_from_frame(joblib.load(args.data))
+    from synthetic_catalog import make_catalog
+    return make_catalog(args.synthetic, seed=args.seed)
+
+
+def _write_array(path, features, block_size, normalize=False):
+    """Write features (optionally L2-normalized) to a .npy in row blocks"""
+    tmp_path = path + '.tmp.npy'
+    out = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=features.shape)
+    for start in range(0, features.shape[0], block_size):
+        block = features[start:start + block_size]
+        out[start:start + block_size] = normalize_rows(block) if normalize else block
+    out.flush()
+    del out
+    os.replace(tmp_path, path)
+
+
+def _init_worker(features_path, normalized_path, model_path):
+    """Open the shared feature files and build the knn engine once per process.
+
+    Workers memory-map the same files, so the catalog is held once in the
+    page cache however many workers run.
+    """
+    features = np.load(features_path, mmap_mode='r')
+    _worker['features'] = features
+    _worker['normalized'] = np.load(normalized_path, mmap_mode='r') if normalized_path else None
+    if model_path:
+        _worker['model'] = joblib.load(model_path)
+    else:
+        # Brute force is what NearestNeighbors picks for 320-dim data anyway
+        _worker['model'] = NearestNeighbors(metric='euclidean', algorithm='brute').fit(features)
+
+
+def _search_block(engine, start, stop, k, out_dir):
+    """Compute one block of results and write it into the output arrays"""
+    features = _worker['features']
+    rows = np.arange(start, stop)
+
+    if engine == 'knn':
+        distances, indices = _worker['model'].kneighbors(features[start:stop], n_neighbors=k + 1)
+        # Drop each row's own entry; if a tie pushed it out, drop the last one
+        keep = indices != rows[:, None]
+        keep[keep.all(axis=1), -1] = False
+        indices = indices[keep].reshape(len(rows), k)
+        scores = distances[keep].reshape(len(rows), k)
+    else:
+        normalized = _worker['normalized']
+        similarities = normalized[start:stop] @ normalized.T
+        # Mask each row's own entry in place rather than via top_k's exclude,
+        # which would make a float64 copy of the block
+        similarities[np.arange(len(rows)), rows] = -np.inf
+        indices, scores = top_k(similarities, k)
+
+    out_indices = np.load(os.path.join(out_dir, f'{engine}_indices.npy'), mmap_mode='r+')
+    out_scores = np.load(os.path.join(out_dir, f'{engine}_scores.npy'), mmap_mode='r+')
+    out_indices[start:stop] = indices
+    out_scores[start:stop] = scores
+    out_indices.flush()
+    out_scores.flush()
+    return engine, start
+
+
+class Progress:
+    """Completed blocks per engine, persisted after every block"""
+
+    def __init__(self, out_dir, config, restart=False):
+        self.path = os.path.join(out_dir, PROGRESS_FILE)
+        self.config = config
+        self.done = {engine: set() for engine in config['engines']}
+        if os.path.exists(self.path) and not restart:
+            with open(self.path) as f:
+                saved = json.load(f)
+            if saved['config'] != config:
+                raise ValueError(f"{self.path} was written with different arguments; "
+                                 "use --restart to start over.")
+            for engine, starts in saved['done'].items():
+                self.done[engine] = set(starts)
+
+    def is_done(self, engine, start):
+        return start in self.done[engine]
+
+    def mark(self, engine, start):
+        self.done[engine].add(start)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'config': self.config, 'done': {e: sorted(s) for e, s in self.done.items()}}, f)
+        os.replace(tmp_path, self.path)
+
+
+def _allocate(out_dir, engine, n_games, k, resume):
+    """Create the output arrays, keeping existing ones when resuming"""
+    for name, dtype in (('indices', np.int32), ('scores', np.float32)):
+        path = os.path.join(out_dir, f'{engine}_{name}.npy')
+        if resume and os.path.exists(path):
+            continue
+        np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(n_games, k)).flush()
+
+
+def run(args):
+    os.makedirs(args.out, exist_ok=True)
+    catalog = load_catalog(args)
+    n_games = len(catalog.names)
+    k = min(args.k, n_games - 1)
+    block_size = args.block_size or max(1, min(4096, BLOCK_BYTES // (n_games * 4)))
+
+    config = {'n_games': n_games, 'k': k, 'block_size': block_size, 'engines': list(args.engines),
+              'source': args.data or f'synthetic-{args.synthetic}-{args.seed}', 'model': args.model}
+    progress = Progress(args.out, config, restart=args.restart)
+    resuming = any(progress.done.values())
+
+    # Inputs the workers memory-map; an existing .npy catalog is used in place
+    features_path = args.data if args.data and args.data.endswith('.npy') else os.path.join(args.out, 'features.npy')
+    if features_path != args.data and not (resuming and os.path.exists(features_path)):
+        _write_array(features_path, catalog.features, block_size=65536)
+    normalized_path = None
+    if 'cosine' in args.engines:
+        normalized_path = os.path.join(args.out, 'normalized.npy')
+        if not (resuming and os.path.exists(normalized_path)):
+            _write_array(normalized_path, catalog.features, block_size=65536, normalize=True)
+    with open(os.path.join(args.out, 'games.json'), 'w') as f:
+        json.dump({'names': list(catalog.names), 'platforms': catalog_platforms(catalog)}, f)
+
+    tasks = []
+    for engine in args.engines:
+        _allocate(args.out, engine, n_games, k, resume=bool(progress.done[engine]))
+        tasks += [(engine, start, min(start + block_size, n_games))
+                  for start in range(0, n_games, block_size) if not progress.is_done(engine, start)]
+    total_blocks = len(args.engines) * -(-n_games // block_size)
+    logger.info("%d of %d blocks left to compute", len(tasks), total_blocks)
+
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(features_path, normalized_path, args.model)) as executor:
+        futures = [executor.submit(_search_block, engine, start, stop, k, args.out) for engine, start, stop in tasks]
+        for finished, future in enumerate(as_completed(futures), 1):
+            engine, start = future.result()
+            progress.mark(engine, start)
+            if finished % 10 == 0 or finished == len(futures):
+                logger.info("%d/%d blocks done (%.1fs)", finished, len(futures), time.perf_counter() - start_time)
+
+    if args.graph and 'cosine' in args.engines:
+        # Same artifact the cosine_topk recommender loads
+        indices = np.load(os.path.join(args.out, 'cosine_indices.npy'), mmap_mode='r')
+        scores = np.load(os.path.join(args.out, 'cosine_scores.npy'), mmap_mode='r')
+        NeighbourGraph(np.arange(0, n_games * k + 1, k, dtype=np.int64), indices.ravel(), scores.ravel()).save(args.graph)
+        logger.info("Wrote neighbour graph to %s", args.graph)
+    return progress
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--data', help="Processed catalog (game_data_processed.pkl or game_features.npy)")
+    source.add_argument('--synthetic', type=int, help="Use a synthetic catalog of this size")
+    parser.add_argument('--out', required=True, help="Output directory")
+    parser.add_argument('--k', type=int, default=10, help="Neighbours per game")
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=list(ENGINES))
+    parser.add_argument('--model', help="Fitted knn model pickle to use instead of an exact euclidean search")
+    parser.add_argument('--block-size', type=int,
+                        help="Games per block (default: what keeps a block's score matrix near 256 MB)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument('--graph', help="Also write the cosine results as a NeighbourGraph .npz")
+    parser.add_argument('--restart', action='store_true', help="Ignore earlier progress and start over")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Offline recall/latency evaluation of the recommendation engines.
+
+Runs the exact knn and cosine GameRecommender modes and the faster engines
+(cosine_topk, ann) over synthetic and real catalogs, and reports recall@k
+against the exact results, p50/p99 latency, throughput and peak memory.
+
+    python evaluate.py --synthetic 10000 50000 --k 10
+    python evaluate.py --data models/game_data_processed.pkl --n-probe 4 8 16 --json results.json
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+import joblib
+import numpy as np
+from sklearn.neighbors import NearestNeighbors
+
+from ann_index import IVFIndex
+from game_recommender import (GameRecommender, NeighbourGraph, feature_matrix_from_frame, normalize_rows,
+                              open_feature_matrix)
+from synthetic_catalog import make_catalog
+
+
+def load_catalog(path):
+    """Load a real processed catalog (.npy feature matrix or pickled DataFrame)"""
+    if path.endswith('.npy'):
+        return open_feature_matrix(path)
+    return feature_matrix_from_frame(joblib.load(path))
+
+
+def build_engines(catalog, n_probes, topk_k, max_dense):
+    """Yield (name, baseline name, build function) for every engine to evaluate"""
+    def knn():
+        model = NearestNeighbors(metric='euclidean').fit(catalog.features)
+        rec = GameRecommender('knn')
+        rec.load_from_objects(model, catalog)
+        return rec
+
+    def dense_similarity():
+        normalized = normalize_rows(catalog.features)
+        return normalized @ normalized.T
+
+    def cosine():
+        rec = GameRecommender('cosine')
+        rec.load_from_objects(None, catalog, similarity_matrix=dense_similarity())
+        return rec
+
+    def cosine_topk():
+        rec = GameRecommender('cosine_topk')
+        graph = NeighbourGraph.from_similarity_matrix(dense_similarity(), topk_k)
+        rec.load_from_objects(None, catalog, neighbour_graph=graph)
+        return rec
+
+    def ann(metric, n_probe):
+        def build():
+            rec = GameRecommender('ann')
+            rec.load_from_objects(None, catalog, ann_index=IVFIndex.build(catalog.features, metric=metric))
+            rec.n_probe = n_probe
+            return rec
+        return build
+
+    dense = len(catalog.names) <= max_dense
+    yield 'knn', 'knn', knn
+    if dense:
+        yield 'cosine', 'cosine', cosine
+        yield 'cosine_topk', 'cosine', cosine_topk
+    for n_probe in n_probes:
+        yield f'ann_euclidean[n_probe={n_probe}]', 'knn', ann('euclidean', n_probe)
+        if dense:
+            yield f'ann_cosine[n_probe={n_probe}]', 'cosine', ann('cosine', n_probe)
+
+
+def run_engine(build, seeds, k):
+    """Build one engine and time it; returns (results per seed, metrics).
+
+    Timings are taken with tracemalloc off, since tracing every allocation
+    slows the engines down. Peak memory comes from a second, traced build
+    and batch query: what the engine allocates on top of the already
+    loaded catalog.
+    """
+    start = time.perf_counter()
+    rec = build()
+    build_seconds = time.perf_counter() - start
+    # Measure the engine itself, not the result cache
+    rec.result_cache = None
+
+    # Single-seed latency, as the Streamlit page issues it
+    latencies = []
+    results = {}
+    for seed in seeds:
+        start = time.perf_counter()
+        results[seed] = rec.recommend(seed, k)
+        latencies.append(time.perf_counter() - start)
+
+    # Batched throughput through recommend_many
+    start = time.perf_counter()
+    rec.recommend_many(seeds, k)
+    batch_seconds = time.perf_counter() - start
+    del rec
+
+    tracemalloc.start()
+    try:
+        rec = build()
+        rec.result_cache = None
+        rec.recommend_many(seeds, k)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    latencies = np.array(latencies) * 1000
+    return results, {
+        'build_s': round(build_seconds, 3),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+        'throughput_qps': round(len(seeds) / batch_seconds, 1) if batch_seconds else None,
+        'peak_mb': round(peak / 1024 ** 2, 1),
+    }
+
+
+def recall_at_k(results, truth):
+    """Mean fraction of the exact top-k games that an engine returned"""
+    recalls = []
+    for seed, expected in truth.items():
+        expected = {(name, platform) for name, _, platform in expected}
+        if expected:
+            got = {(name, platform) for name, _, platform in results[seed]}
+            recalls.append(len(got & expected) / len(expected))
+    return round(float(np.mean(recalls)), 4) if recalls else None
+
+
+def evaluate_catalog(label, catalog, args):
+    rng = np.random.default_rng(args.seed)
+    # Unique names only, so every seed resolves to the row it was drawn from
+    unique = [name for name, count in zip(*np.unique(catalog.names, return_counts=True)) if count == 1]
+    seeds = [str(name) for name in rng.choice(unique, size=min(args.queries, len(unique)), replace=False)]
+
+    rows = []
+    baselines = {}
+    for name, baseline, build in build_engines(catalog, args.n_probe, args.topk_k, args.max_dense):
+        results, metrics = run_engine(build, seeds, args.k)
+        if name == baseline:
+            baselines[name] = results
+        metrics['recall_at_k'] = recall_at_k(results, baselines[baseline])
+        rows.append({'catalog': label, 'n_games': len(catalog.names), 'engine': name,
+                     'baseline': baseline, 'k': args.k, **metrics})
+        print(f"{label:>16} {name:<28} recall@{args.k}={metrics['recall_at_k']:<6} "
+              f"p50={metrics['p50_ms']}ms p99={metrics['p99_ms']}ms "
+              f"{metrics['throughput_qps']} q/s peak={metrics['peak_mb']}MB build={metrics['build_s']}s")
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--synthetic', type=int, nargs='*', default=[10000],
+                        help="Synthetic catalog sizes to evaluate")
+    parser.add_argument('--data', nargs='*', default=[],
+                        help="Real processed catalogs (.npy feature matrix or pickled DataFrame)")
+    parser.add_argument('--k', type=int, default=10, help="Recommendations per query")
+    parser.add_argument('--queries', type=int, default=500, help="Seed games per catalog")
+    parser.add_argument('--n-probe', type=int, nargs='*', default=[4, 8, 16], help="ANN probe counts to sweep")
+    parser.add_argument('--topk-k', type=int, default=10, help="Neighbours kept per game by cosine_topk")
+    parser.add_argument('--max-dense', type=int, default=20000,
+                        help="Largest catalog for which the dense n x n cosine matrix is built")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="Write all results to this JSON file")
+    args = parser.parse_args(argv)
+
+    rows = []
+    for n_games in args.synthetic:
+        rows += evaluate_catalog(f"synthetic-{n_games}", make_catalog(n_games, seed=args.seed), args)
+    for path in args.data:
+        rows += evaluate_catalog(path, load_catalog(path), args)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=2)
+    return rows
+
+
+if __name__ == "__main__":
+    main()
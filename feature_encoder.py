@@ -0,0 +1,57 @@
+import numpy as np
+
+# Numerical inputs, in the order the scaler was fitted on and the order they
+# lead the processed feature vector
+NUMERICAL_COLS = ['NA_Sales', 'EU_Sales', 'JP_Sales', 'Other_Sales', 'User_Score']
+
+
+class FeatureEncoder:
+    """Encode raw game attributes into the processed feature layout.
+
+    Compiled once from the one-hot column list and the fitted MinMaxScaler.
+    Produces the same vector as the old DataFrame pipeline (scaled numerical
+    columns followed by ``one_hot_columns``) by writing straight into a NumPy
+    array at precomputed positions.
+    """
+
+    def __init__(self, one_hot_columns, scaler, numerical_cols=NUMERICAL_COLS, dtype=np.float32):
+        self.numerical_cols = list(numerical_cols)
+        self.one_hot_columns = list(one_hot_columns)
+        self.n_features = len(self.numerical_cols) + len(self.one_hot_columns)
+        self.dtype = dtype
+
+        # Column label -> position in the output vector
+        offset = len(self.numerical_cols)
+        self.positions = {col: offset + i for i, col in enumerate(self.one_hot_columns)}
+
+        # MinMaxScaler.transform is x * scale_ + min_, optionally clipped
+        self.scale = np.asarray(scaler.scale_, dtype=np.float64)
+        self.min = np.asarray(scaler.min_, dtype=np.float64)
+        self.clip = scaler.feature_range if getattr(scaler, 'clip', False) else None
+
+    def encode(self, user_input):
+        """Encode one input dict into a 1-D feature vector"""
+        return self.encode_many([user_input])[0]
+
+    def encode_many(self, user_inputs):
+        """Encode a list of input dicts into a (len(user_inputs), n_features) array"""
+        out = np.zeros((len(user_inputs), self.n_features), dtype=self.dtype)
+        numerical = np.empty((len(user_inputs), len(self.numerical_cols)), dtype=np.float64)
+
+        for row, user_input in enumerate(user_inputs):
+            for j, col in enumerate(self.numerical_cols):
+                numerical[row, j] = user_input[col]
+
+            # Categorical values become "<column>_<value>" one-hot labels;
+            # the year is categorical even though it is entered as a number
+            for key, value in user_input.items():
+                if key == 'Year_of_Release' or isinstance(value, str):
+                    position = self.positions.get(f"{key}_{value}")
+                    if position is not None:
+                        out[row, position] = 1
+
+        numerical = numerical * self.scale + self.min
+        if self.clip is not None:
+            numerical = np.clip(numerical, *self.clip)
+        out[:, :len(self.numerical_cols)] = numerical
+        return out
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+
+class GameDetailIndex:
+    """Name/platform index over the complete game table.
+
+    Built once at load time so display code can fetch the detail rows of a
+    handful of recommendations without scanning the whole table.
+    ``game_data`` is a DataFrame or a shared_store.SharedFrame.
+    """
+
+    def __init__(self, game_data):
+        self.game_data = game_data
+        keys = pd.DataFrame({column: np.asarray(game_data[column])
+                             for column in ('Name', 'Platform') if column in game_data.columns})
+        self.by_name = keys.groupby('Name', sort=False).indices
+        self.by_name_platform = {}
+        if 'Platform' in keys.columns:
+            self.by_name_platform = keys.groupby(['Name', 'Platform'], sort=False).indices
+
+    def positions(self, name, platform=None):
+        """Row positions for one game; every platform when none is given"""
+        if platform is not None:
+            rows = self.by_name_platform.get((name, platform))
+            if rows is not None:
+                return rows
+        return self.by_name.get(name, np.empty(0, dtype=np.intp))
+
+    def lookup(self, recommendations):
+        """Detail rows for (game, score[, platform]) tuples, in rank order"""
+        rows = []
+        for recommendation in recommendations:
+            platform = recommendation[2] if len(recommendation) > 2 else None
+            rows.extend(self.positions(recommendation[0], platform))
+        # A game recommended twice (e.g. no platform known) is shown once
+        rows = list(dict.fromkeys(rows))
+        return self.game_data.iloc[rows]
@@ -1,61 +1,865 @@
 import joblib
+import numpy as np
+from sklearn.base import clone
 from sklearn.metrics.pairwise import cosine_similarity
 import io
+import json
+import os
+import itertools
+from collections import namedtuple
+from artifact_registry import registry as default_registry
+from ann_index import IVFIndex
+from result_cache import result_cache as default_result_cache
+from metrics import metrics
+
+# Every artifact load gets a new generation, so cached results of the
+# previous artifacts can never be served
+_generations = itertools.count(1)
+
+SIMILARITY_FORMAT_VERSION = 1
+FEATURE_FORMAT_VERSION = 1
+
+# Processed game features: one row per entry of ``names``, one column per
+# entry of ``columns``
+FeatureMatrix = namedtuple('FeatureMatrix', ['features', 'names', 'columns'])
+
+
+def top_k(scores, k, exclude=None):
+    """Return (indices, scores) of the k highest scores, best first.
+
+    Works on a single score row or on a 2-D batch of rows. ``exclude`` is the
+    column to drop from each row (e.g. the query game itself).
+    """
+    scores = np.asarray(scores)
+    single = scores.ndim == 1
+    scores = np.atleast_2d(scores)
+
+    if exclude is not None:
+        scores = scores.astype(np.float64, copy=True)
+        scores[np.arange(scores.shape[0]), np.atleast_1d(exclude)] = -np.inf
+
+    n = scores.shape[1] - (exclude is not None)
+    k = max(0, min(k, n))
+
+    # Partition so only the k winners need sorting
+    if k == 0:
+        candidates = np.empty((scores.shape[0], 0), dtype=np.intp)
+    elif k < scores.shape[1]:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind='stable')
+    indices = np.take_along_axis(candidates, order, axis=1)
+    values = np.take_along_axis(candidate_scores, order, axis=1)
+
+    if single:
+        return indices[0], values[0]
+    return indices, values
+
+
+def _header_path(npy_path):
+    return os.path.splitext(npy_path)[0] + '.json'
+
+
+def save_similarity_matrix(matrix, path, dtype=np.float32):
+    """Write a similarity matrix as a raw .npy file plus a small JSON header.
+
+    ``dtype`` may be float32 or float16; the file is opened with
+    ``open_similarity_matrix`` and memory-mapped instead of unpickled.
+    """
+    if not path.endswith('.npy'):
+        raise ValueError("Similarity matrix path must end with .npy")
+    matrix = np.ascontiguousarray(matrix, dtype=dtype)
+    if matrix.ndim != 2 or matrix.shape[0] != matrix.shape[1]:
+        raise ValueError("Similarity matrix must be square.")
+    np.save(path, matrix)
+    _write_similarity_header(path, matrix.dtype, matrix.shape)
+
+
+def _write_similarity_header(path, dtype, shape):
+    header = {
+        'version': SIMILARITY_FORMAT_VERSION,
+        'dtype': np.dtype(dtype).name,
+        'shape': list(shape),
+    }
+    with open(_header_path(path), 'w') as f:
+        json.dump(header, f)
+
+
+def open_similarity_matrix(path, header_path=None):
+    """Memory-map a matrix written by save_similarity_matrix (read-only)"""
+    with open(header_path or _header_path(path)) as f:
+        header = json.load(f)
+    if header.get('version') != SIMILARITY_FORMAT_VERSION:
+        raise ValueError(f"Unsupported similarity matrix format: {header.get('version')}")
+
+    matrix = np.load(path, mmap_mode='r')
+    if list(matrix.shape) != header['shape'] or matrix.dtype.name != header['dtype']:
+        raise ValueError("Similarity matrix does not match its header.")
+    return matrix
+
+
+def extend_similarity_matrix(matrix, new_similarities, out=None, block_size=4096):
+    """Grow an n x n similarity matrix by m games.
+
+    ``new_similarities`` is (m, n + m): the new games against every game,
+    themselves included. Existing entries are copied, not recomputed.
+    ``out`` may be a preallocated (n + m) x (n + m) array, e.g. a memmap.
+    """
+    n, m = matrix.shape[0], len(new_similarities)
+    if out is None:
+        out = np.empty((n + m, n + m), dtype=matrix.dtype)
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        out[start:stop, :n] = matrix[start:stop]
+        out[start:stop, n:] = new_similarities[:, start:stop].T
+    out[n:] = new_similarities
+    return out
+
+
+def shrink_similarity_matrix(matrix, keep, out=None, block_size=4096):
+    """Drop the rows and columns of a similarity matrix where ``keep`` is False"""
+    kept = np.flatnonzero(keep)
+    if out is None:
+        out = np.empty((len(kept), len(kept)), dtype=matrix.dtype)
+    for start in range(0, len(kept), block_size):
+        rows = kept[start:start + block_size]
+        out[start:start + len(rows)] = matrix[rows][:, kept]
+    return out
+
+
+class PendingUpdate:
+    """A file change that has been written aside but is not yet visible.
+
+    ``commit()`` publishes it with renames and header writes only, so several
+    pending updates can be prepared and then published together;
+    ``rollback()`` discards it and leaves the files as they were.
+    """
+
+    def __init__(self, commit, rollback):
+        self._commit = commit
+        self._rollback = rollback
+
+    def commit(self):
+        self._commit()
+
+    def rollback(self):
+        self._rollback()
+
+
+def _remove_file(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def staged_replace(path, write):
+    """PendingUpdate that replaces path with what ``write(tmp_path)`` produces"""
+    tmp_path = path + '.tmp' + os.path.splitext(path)[1]
+    try:
+        write(tmp_path)
+    except BaseException:
+        _remove_file(tmp_path)
+        raise
+    return PendingUpdate(lambda: os.replace(tmp_path, path), lambda: _remove_file(tmp_path))
+
+
+def update_similarity_file(path, new_similarities=None, keep=None):
+    """Apply extend_similarity_matrix or shrink_similarity_matrix to a .npy file.
+
+    The result is streamed to a new file in row blocks and swapped in, so
+    the full matrix is never held in memory.
+    """
+    stage_similarity_update(path, new_similarities, keep).commit()
+
+
+def stage_similarity_update(path, new_similarities=None, keep=None):
+    """Write the result of update_similarity_file aside, as a PendingUpdate"""
+    matrix = open_similarity_matrix(path)
+    if new_similarities is not None:
+        size = matrix.shape[0] + len(new_similarities)
+    else:
+        size = int(np.count_nonzero(keep))
+    dtype = matrix.dtype
+
+    def write(tmp_path):
+        out = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=dtype, shape=(size, size))
+        if new_similarities is not None:
+            extend_similarity_matrix(matrix, new_similarities.astype(dtype), out)
+        else:
+            shrink_similarity_matrix(matrix, keep, out)
+        out.flush()
+
+    pending = staged_replace(path, write)
+    del matrix
+
+    def commit():
+        pending.commit()
+        _write_similarity_header(path, dtype, (size, size))
+    return PendingUpdate(commit, pending.rollback)
+
+
+def feature_matrix_from_frame(data, dtype=np.float32):
+    """Convert the legacy processed DataFrame into a FeatureMatrix"""
+    features = np.ascontiguousarray(data.to_numpy(dtype=dtype))
+    return FeatureMatrix(features, data.index.tolist(), [str(c) for c in data.columns])
+
+
+def save_feature_matrix(data, path, dtype=np.float32):
+    """Write the processed game DataFrame as a contiguous .npy feature array.
+
+    ``data`` may also be a FeatureMatrix. Game names and column labels go
+    into a JSON header next to it, so the matrix can be opened with
+    ``open_feature_matrix`` without unpickling.
+    """
+    stage_feature_matrix(data, path, dtype).commit()
+
+
+def stage_feature_matrix(data, path, dtype=np.float32):
+    """Write the result of save_feature_matrix aside, as a PendingUpdate"""
+    if not path.endswith('.npy'):
+        raise ValueError("Feature matrix path must end with .npy")
+    if isinstance(data, FeatureMatrix):
+        matrix = FeatureMatrix(np.ascontiguousarray(data.features, dtype=dtype), list(data.names), data.columns)
+    else:
+        matrix = feature_matrix_from_frame(data, dtype)
+    # Write under a temporary name so readers never see a partial file
+    pending = staged_replace(path, lambda tmp_path: np.save(tmp_path, matrix.features))
+
+    def commit():
+        pending.commit()
+        _write_feature_header(path, matrix.features.dtype, matrix.features.shape, matrix.columns, matrix.names)
+    return PendingUpdate(commit, pending.rollback)
+
+
+def _write_feature_header(path, dtype, shape, columns, names):
+    header = {
+        'version': FEATURE_FORMAT_VERSION,
+        'dtype': np.dtype(dtype).name,
+        'shape': list(shape),
+        'columns': list(columns),
+        'names': list(names),
+    }
+    tmp_path = _header_path(path) + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(header, f)
+    os.replace(tmp_path, _header_path(path))
+
+
+def open_feature_matrix(path, header_path=None):
+    """Memory-map a matrix written by save_feature_matrix as a FeatureMatrix"""
+    with open(header_path or _header_path(path)) as f:
+        header = json.load(f)
+    if header.get('version') != FEATURE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported feature matrix format: {header.get('version')}")
+
+    features = np.load(path, mmap_mode='r')
+    if list(features.shape) != header['shape'] or features.dtype.name != header['dtype']:
+        raise ValueError("Feature matrix does not match its header.")
+    if len(header['names']) != features.shape[0] or len(header['columns']) != features.shape[1]:
+        raise ValueError("Feature matrix header has the wrong number of names or columns.")
+    return FeatureMatrix(features, header['names'], header['columns'])
+
+
+def append_feature_matrix(path, features, names):
+    """Append rows to a matrix written by save_feature_matrix, in place.
+
+    Only the new rows are written, plus the updated shape in the .npy header
+    (which has spare padding) and the JSON header. Falls back to rewriting
+    the file if the shape no longer fits in the existing .npy header.
+    """
+    stage_feature_append(path, features, names).commit()
+
+
+def stage_feature_append(path, features, names):
+    """Write the rows of append_feature_matrix without publishing them.
+
+    The rows go after the end of the file, which still reads as the old
+    matrix since its headers are unchanged. ``commit()`` rewrites the
+    headers; ``rollback()`` truncates the rows again.
+    """
+    current = open_feature_matrix(path)
+    features = np.ascontiguousarray(np.atleast_2d(features), dtype=current.features.dtype)
+    names = list(names)
+    if features.shape != (len(names), current.features.shape[1]):
+        raise ValueError("New rows must have one name each and the catalog's number of columns.")
+    shape = (current.features.shape[0] + len(names), current.features.shape[1])
+    columns, all_names = current.columns, current.names + names
+
+    npy_format = np.lib.format
+    header_io = {(1, 0): (npy_format.read_array_header_1_0, npy_format.write_array_header_1_0),
+                 (2, 0): (npy_format.read_array_header_2_0, npy_format.write_array_header_2_0)}
+    with open(path, 'r+b') as f:
+        read_header, write_header = header_io.get(npy_format.read_magic(f), (None, None))
+        header = None
+        if read_header is not None:
+            _, fortran_order, dtype = read_header(f)
+            data_offset = f.tell()
+            buffer = io.BytesIO()
+            write_header(buffer, {'descr': npy_format.dtype_to_descr(dtype), 'fortran_order': False,
+                                  'shape': shape})
+            # np.save leaves room in the header for the first axis to grow
+            if not fortran_order and len(buffer.getvalue()) == data_offset:
+                header = buffer.getvalue()
+        if header is not None:
+            old_size = f.seek(0, os.SEEK_END)
+            try:
+                f.write(features.tobytes())
+            except BaseException:
+                f.truncate(old_size)
+                raise
+
+    if header is None:
+        matrix = FeatureMatrix(np.concatenate([current.features, features]), all_names, columns)
+        del current
+        return stage_feature_matrix(matrix, path, features.dtype)
+    del current
+
+    def commit():
+        with open(path, 'r+b') as f:
+            f.write(header)
+        _write_feature_header(path, features.dtype, shape, columns, all_names)
+
+    def rollback():
+        with open(path, 'r+b') as f:
+            f.truncate(old_size)
+    return PendingUpdate(commit, rollback)
+
+
+def normalize_rows(features):
+    """Return an L2-normalized contiguous float32 copy; zero rows stay zero"""
+    features = np.array(features, dtype=np.float32, order='C')
+    norms = np.linalg.norm(features, axis=1, keepdims=True)
+    features /= np.maximum(norms, np.finfo(np.float32).tiny)
+    return features
+
+
+def catalog_platforms(data):
+    """Platform of every row, read back from its Platform_* one-hot column.
+
+    Duplicate titles differ by platform, so this tells the rows apart. Rows
+    without an active platform column (or data without any) get None.
+    """
+    positions = [i for i, column in enumerate(data.columns) if str(column).startswith('Platform_')]
+    if not positions:
+        return [None] * len(data.names)
+    labels = [str(data.columns[i])[len('Platform_'):] for i in positions]
+    one_hot = np.asarray(data.features[:, positions])
+    active = one_hot.argmax(axis=1)
+    return [labels[j] if one_hot[row, j] > 0 else None for row, j in enumerate(active)]
+
+
+def _drop_query(indices, distances, query_idx, n):
+    """Remove the query row from one kneighbors result and keep n entries"""
+    keep = indices != query_idx
+    return indices[keep][:n], distances[keep][:n]
+
+
+class NeighbourGraph:
+    """Top-K neighbours and scores per game in CSR layout.
+
+    Row ``i`` holds its neighbours in ``indices[indptr[i]:indptr[i + 1]]``,
+    best first, so a lookup is a slice. Storage grows as n * K instead of n².
+    """
+
+    def __init__(self, indptr, indices, scores):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.scores = np.asarray(scores, dtype=np.float32)
+
+    @property
+    def n_rows(self):
+        return len(self.indptr) - 1
+
+    @classmethod
+    def from_similarity_matrix(cls, matrix, k, block_size=1024):
+        """Keep the top k neighbours of every row of a dense similarity matrix"""
+        n = matrix.shape[0]
+        k = min(k, n - 1)
+        indices = np.empty((n, k), dtype=np.int32)
+        scores = np.empty((n, k), dtype=np.float32)
+        # Work in row blocks so memory-mapped matrices are never fully loaded
+        for start in range(0, n, block_size):
+            stop = min(start + block_size, n)
+            rows = np.arange(start, stop)
+            indices[start:stop], scores[start:stop] = top_k(matrix[start:stop], k, exclude=rows)
+        indptr = np.arange(0, n * k + 1, k, dtype=np.int64)
+        return cls(indptr, indices.ravel(), scores.ravel())
+
+    @classmethod
+    def load(cls, file):
+        """Load a graph written by save (path or file-like object)"""
+        with np.load(file) as arrays:
+            return cls(arrays['indptr'], arrays['indices'], arrays['scores'])
+
+    def save(self, file):
+        np.savez(file, indptr=self.indptr, indices=self.indices, scores=self.scores)
+
+    def neighbours(self, row):
+        start, stop = self.indptr[row], self.indptr[row + 1]
+        return self.indices[start:stop], self.scores[start:stop]
+
+    @property
+    def k(self):
+        """Longest neighbour list; rows may hold fewer after removals"""
+        return int(np.diff(self.indptr).max()) if self.n_rows else 0
+
+    def _padded(self):
+        """(n, k) copies of indices and scores, short rows padded with -1 / -inf"""
+        lengths = np.diff(self.indptr)
+        indices = np.full((self.n_rows, self.k), -1, dtype=np.int32)
+        scores = np.full((self.n_rows, self.k), -np.inf, dtype=np.float32)
+        rows = np.repeat(np.arange(self.n_rows), lengths)
+        cols = np.arange(len(self.indices)) - np.repeat(self.indptr[:-1], lengths)
+        indices[rows, cols] = self.indices
+        scores[rows, cols] = self.scores
+        return indices, scores
+
+    @classmethod
+    def _from_padded(cls, indices, scores):
+        valid = indices >= 0
+        indptr = np.zeros(len(indices) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(valid.sum(axis=1))
+        return cls(indptr, indices[valid], scores[valid])
+
+    def extend(self, new_similarities, block_size=8192):
+        """Graph with rows for m new games appended.
+
+        ``new_similarities`` is (m, n + m): the new games against every game,
+        themselves included. New rows get their top K; an existing row only
+        changes where a new game beats its current worst neighbour.
+        """
+        n, m, k = self.n_rows, len(new_similarities), self.k
+        indices, scores = self._padded()
+        new_ids = np.arange(n, n + m)
+
+        cross = new_similarities[:, :n].T
+        changed = np.flatnonzero(cross.max(axis=1) > scores[:, -1]) if k and m else np.empty(0, dtype=np.intp)
+        for start in range(0, len(changed), block_size):
+            rows = changed[start:start + block_size]
+            candidate_ids = np.hstack([indices[rows], np.broadcast_to(new_ids, (len(rows), m))])
+            best, best_scores = top_k(np.hstack([scores[rows], cross[rows]]), k)
+            indices[rows] = np.take_along_axis(candidate_ids, best, axis=1)
+            scores[rows] = best_scores
+
+        new_indices = np.full((m, k), -1, dtype=np.int32)
+        new_scores = np.full((m, k), -np.inf, dtype=np.float32)
+        best, best_scores = top_k(new_similarities, k, exclude=new_ids)
+        new_indices[:, :best.shape[1]] = best
+        new_scores[:, :best.shape[1]] = best_scores
+        return self._from_padded(np.vstack([indices, new_indices]), np.vstack([scores, new_scores]))
+
+    def remove(self, keep):
+        """Graph without the rows where ``keep`` is False, renumbered.
+
+        Neighbours that were removed are dropped from the remaining lists.
+        Returns ``(graph, short_rows)``: the new row numbers whose lists lost
+        entries, which ``replace_rows`` can refill.
+        """
+        keep = np.asarray(keep, dtype=bool)
+        indices, scores = self._padded()
+        indices, scores = indices[keep], scores[keep]
+
+        valid = indices >= 0
+        dropped = valid & ~keep[np.where(valid, indices, 0)]
+        indices[dropped], scores[dropped] = -1, -np.inf
+        # Close the gaps, keeping the best-first order
+        order = np.argsort(-scores, axis=1, kind='stable')
+        indices = np.take_along_axis(indices, order, axis=1)
+        scores = np.take_along_axis(scores, order, axis=1)
+
+        new_row = (np.cumsum(keep) - 1).astype(np.int32)
+        indices = np.where(indices >= 0, new_row[np.maximum(indices, 0)], -1).astype(np.int32)
+        return self._from_padded(indices, scores), np.flatnonzero(dropped.any(axis=1))
+
+    def replace_rows(self, rows, indices, scores):
+        """Graph with the neighbour lists of ``rows`` replaced (best first)"""
+        padded_indices, padded_scores = self._padded()
+        k = max(padded_indices.shape[1], np.shape(indices)[1])
+        if k > padded_indices.shape[1]:
+            extra = k - padded_indices.shape[1]
+            padded_indices = np.pad(padded_indices, ((0, 0), (0, extra)), constant_values=-1)
+            padded_scores = np.pad(padded_scores, ((0, 0), (0, extra)), constant_values=-np.inf)
+        padded_indices[rows] = -1
+        padded_scores[rows] = -np.inf
+        padded_indices[rows, :np.shape(indices)[1]] = indices
+        padded_scores[rows, :np.shape(indices)[1]] = scores
+        return self._from_padded(padded_indices, padded_scores)
+
 
 class GameRecommender:
     def __init__(self, model_type='knn'):
         self.model_type = model_type
         self.model = None
         self.data = None
+        self.features = None
+        self.feature_columns = None
+        self.normalized_features = None
         self.game_names = None
+        self.game_platforms = None
+        self.game_index = {}
         self.similarity_matrix = None
+        self.neighbour_graph = None
+        self.ann_index = None
+        # Inverted lists scanned per 'ann' query; None uses the index default
+        self.n_probe = None
+        # Shared LRU of recommend results; set to None to disable caching
+        self.result_cache = default_result_cache
+        self.generation = None
 
-    def load_from_gcs(self, storage_client, bucket_name, model_path, data_path, similarity_matrix_path=None):
-        """Load models and data directly from GCS bucket"""
+    def _build_game_index(self):
+        """Build the name -> row lookup used by recommend.
+
+        The same title can appear once per platform; the first row wins, which
+        matches what ``game_names.index`` returned before.
+        """
+        self.game_index = {}
+        for i, name in enumerate(self.game_names):
+            self.game_index.setdefault(name, i)
+
+    def _game_idx(self, game_name):
+        game_idx = self.game_index.get(game_name)
+        if game_idx is None:
+            raise ValueError("Game not found in the dataset.")
+        return game_idx
+
+    def load_from_gcs(self, storage_client, bucket_name, model_path, data_path, similarity_matrix_path=None,
+                      neighbour_graph_path=None, registry=None, ann_index_path=None):
+        """Load models and data from GCS bucket.
+
+        Artifacts come from the shared registry, so recommenders loading the
+        same model or data share one copy.
+        """
         bucket = storage_client.bucket(bucket_name)
+        registry = registry or default_registry
         
-        # Load model
-        model_blob = bucket.blob(model_path)
-        self.model = joblib.load(io.BytesIO(model_blob.download_as_bytes()))
-        
-        # Load data
-        data_blob = bucket.blob(data_path)
-        self.data = joblib.load(io.BytesIO(data_blob.download_as_bytes()))
-        self.game_names = self.data.index.tolist()
+        # Load model and data
+        model = registry.load(bucket, model_path, joblib.load)
+        if data_path.endswith('.npy'):
+            # Columnar features: memory-map the cached file
+            header_path = registry.cache.fetch(bucket.blob(_header_path(data_path)))
+            data = registry.load(bucket, data_path, lambda path: open_feature_matrix(path, header_path))
+        else:
+            data = registry.load(bucket, data_path, lambda path: feature_matrix_from_frame(joblib.load(path)))
 
+        similarity_matrix = None
         if self.model_type == 'cosine' and similarity_matrix_path:
             # Load similarity matrix
-            sim_blob = bucket.blob(similarity_matrix_path)
-            self.similarity_matrix = joblib.load(io.BytesIO(sim_blob.download_as_bytes()))
+            if similarity_matrix_path.endswith('.npy'):
+                # Raw matrix: memory-map the cached file
+                header_path = registry.cache.fetch(bucket.blob(_header_path(similarity_matrix_path)))
+                similarity_matrix = registry.load(bucket, similarity_matrix_path,
+                                                  lambda path: open_similarity_matrix(path, header_path))
+            else:
+                similarity_matrix = registry.load(bucket, similarity_matrix_path, joblib.load)
+
+        neighbour_graph = None
+        if self.model_type == 'cosine_topk' and neighbour_graph_path:
+            # Load sparse top-K neighbour graph
+            neighbour_graph = registry.load(bucket, neighbour_graph_path, NeighbourGraph.load)
+
+        ann_index = None
+        if self.model_type == 'ann' and ann_index_path:
+            # Load approximate nearest-neighbour index
+            ann_index = registry.load(bucket, ann_index_path, IVFIndex.load)
+
+        self.load_from_objects(model, data, similarity_matrix, neighbour_graph, ann_index)
 
-    def load_from_bytes(self, model_bytes, data_bytes, similarity_matrix_bytes=None):
+    def _new_generation(self):
+        """Start a new model generation and drop the old one's cached results"""
+        if self.result_cache is not None and self.generation is not None:
+            self.result_cache.invalidate(self.generation)
+        self.generation = next(_generations)
+
+    def load_from_objects(self, model, data, similarity_matrix=None, neighbour_graph=None, ann_index=None,
+                          normalized_features=None):
+        """Use artifacts that have already been deserialized.
+
+        ``data`` is either a FeatureMatrix or the legacy processed DataFrame.
+        ``normalized_features`` may pass in ``normalize_rows(features)``
+        computed elsewhere (e.g. in shared memory) instead of a private copy.
+        """
+        self._new_generation()
+        self.model = model
+        self.data = None
+        if not isinstance(data, FeatureMatrix):
+            self.data = data
+            data = feature_matrix_from_frame(data)
+        self.features = data.features
+        self.feature_columns = list(data.columns)
+        self.game_names = list(data.names)
+        self.game_platforms = catalog_platforms(data)
+        self._build_game_index()
+
+        # Unit-length copy of the features so feature queries are one matmul
+        self.normalized_features = None
+        if self.model_type in ('cosine', 'cosine_topk'):
+            if normalized_features is not None and normalized_features.shape != self.features.shape:
+                raise ValueError("Normalized features do not match the game data.")
+            self.normalized_features = (normalized_features if normalized_features is not None
+                                        else normalize_rows(self.features))
+
+        if self.model_type == 'cosine' and similarity_matrix is not None:
+            if similarity_matrix.shape[0] != len(self.game_names):
+                raise ValueError("Similarity matrix size does not match the game data.")
+            self.similarity_matrix = similarity_matrix
+
+        if self.model_type == 'cosine_topk' and neighbour_graph is not None:
+            if neighbour_graph.n_rows != len(self.game_names):
+                raise ValueError("Neighbour graph size does not match the game data.")
+            self.neighbour_graph = neighbour_graph
+
+        if self.model_type == 'ann' and ann_index is not None:
+            if ann_index.n_rows != len(self.game_names):
+                raise ValueError("ANN index size does not match the game data.")
+            self.ann_index = ann_index
+
+    def load_from_bytes(self, model_bytes, data_bytes, similarity_matrix_bytes=None, neighbour_graph_bytes=None,
+                        ann_index_bytes=None):
         """Load models and data from bytes objects"""
-        self.model = joblib.load(io.BytesIO(model_bytes))
-        self.data = joblib.load(io.BytesIO(data_bytes))
-        self.game_names = self.data.index.tolist()
+        model = joblib.load(io.BytesIO(model_bytes))
+        data = joblib.load(io.BytesIO(data_bytes))
 
+        similarity_matrix = None
         if self.model_type == 'cosine' and similarity_matrix_bytes:
-            self.similarity_matrix = joblib.load(io.BytesIO(similarity_matrix_bytes))
+            similarity_matrix = joblib.load(io.BytesIO(similarity_matrix_bytes))
+
+        neighbour_graph = None
+        if self.model_type == 'cosine_topk' and neighbour_graph_bytes:
+            neighbour_graph = NeighbourGraph.load(io.BytesIO(neighbour_graph_bytes))
+
+        ann_index = None
+        if self.model_type == 'ann' and ann_index_bytes:
+            ann_index = IVFIndex.load(io.BytesIO(ann_index_bytes))
+
+        self.load_from_objects(model, data, similarity_matrix, neighbour_graph, ann_index)
+
+    def load_neighbour_graph(self, file):
+        """Load a NeighbourGraph saved with NeighbourGraph.save"""
+        graph = NeighbourGraph.load(file)
+        if self.game_names is not None and graph.n_rows != len(self.game_names):
+            raise ValueError("Neighbour graph size does not match the game data.")
+        self.neighbour_graph = graph
+        self._new_generation()
+
+    def load_similarity_matrix(self, path, header_path=None):
+        """Memory-map a local .npy similarity matrix; only queried rows are read"""
+        matrix = open_similarity_matrix(path, header_path)
+        if self.game_names is not None and matrix.shape[0] != len(self.game_names):
+            raise ValueError("Similarity matrix size does not match the game data.")
+        self.similarity_matrix = matrix
+        self._new_generation()
+
+    def add_games(self, features, names, block_size=4096):
+        """Append games to the catalog without rebuilding it.
+
+        ``features`` holds one processed feature row per name. Only the new
+        games' similarities are computed: the similarity matrix grows by
+        their rows and columns, the neighbour graph gains their rows (an
+        existing row changes only where a new game beats its worst
+        neighbour), and the ANN index files them into its existing lists.
+        The knn model is refitted on the grown matrix. Artifacts may be shared
+        with other recommenders, so new objects replace them rather than
+        being modified. Returns the row numbers of the new games.
+        """
+        new = np.atleast_2d(np.asarray(features, dtype=self.features.dtype))
+        names = list(names)
+        if new.shape != (len(names), self.features.shape[1]):
+            raise ValueError("New games need one name each and one value per feature column.")
+        if not np.isfinite(new).all():
+            raise ValueError("New games have missing or non-finite feature values.")
+        n = len(self.game_names)
+        features = np.concatenate([self.features, new])
+
+        # Build every updated artifact before switching to any of them
+        updated = {}
+        normalized = None
+        if self.normalized_features is not None:
+            new_normalized = normalize_rows(new)
+            normalized = np.concatenate([self.normalized_features, new_normalized])
+            if self.similarity_matrix is not None or self.neighbour_graph is not None:
+                new_similarities = new_normalized @ normalized.T
+                if self.similarity_matrix is not None:
+                    updated['similarity_matrix'] = extend_similarity_matrix(
+                        self.similarity_matrix, new_similarities, block_size=block_size)
+                if self.neighbour_graph is not None:
+                    updated['neighbour_graph'] = self.neighbour_graph.extend(new_similarities)
+        if self.ann_index is not None:
+            updated['ann_index'] = self.ann_index.add(new)
+
+        platforms = catalog_platforms(FeatureMatrix(new, names, self.feature_columns))
+        self._set_catalog(features, self.game_names + names, self.game_platforms + platforms, normalized,
+                          **updated)
+        return np.arange(n, n + len(names))
+
+    def remove_games(self, game_names, block_size=4096):
+        """Remove every row of the given titles from the catalog.
+
+        Nothing is recomputed except the neighbour lists that contained a
+        removed game, which are refilled from the remaining catalog. Returns
+        the number of rows removed.
+        """
+        game_names = set(game_names)
+        missing = game_names - self.game_index.keys()
+        if missing:
+            raise ValueError(f"Games not found in the dataset: {sorted(missing)}")
+        keep = np.array([name not in game_names for name in self.game_names], dtype=bool)
+
+        updated = {}
+        normalized = self.normalized_features[keep] if self.normalized_features is not None else None
+        if self.similarity_matrix is not None:
+            updated['similarity_matrix'] = shrink_similarity_matrix(self.similarity_matrix, keep,
+                                                                    block_size=block_size)
+        if self.neighbour_graph is not None:
+            graph, short_rows = self.neighbour_graph.remove(keep)
+            k = min(self.neighbour_graph.k, int(keep.sum()) - 1)
+            for start in range(0, len(short_rows), block_size):
+                rows = short_rows[start:start + block_size]
+                indices, scores = top_k(normalized[rows] @ normalized.T, k, exclude=rows)
+                graph = graph.replace_rows(rows, indices, scores)
+            updated['neighbour_graph'] = graph
+        if self.ann_index is not None:
+            updated['ann_index'] = self.ann_index.remove(keep)
+
+        self._set_catalog(self.features[keep], [name for name, kept in zip(self.game_names, keep) if kept],
+                          [platform for platform, kept in zip(self.game_platforms, keep) if kept], normalized,
+                          **updated)
+        return int((~keep).sum())
+
+    def _set_catalog(self, features, names, platforms, normalized, **artifacts):
+        """Switch to an updated catalog and start a new result generation.
+
+        ``artifacts`` are updated attributes (similarity_matrix,
+        neighbour_graph, ann_index) set together with the catalog, once the
+        knn model has been refitted.
+        """
+        model = self.model
+        if model is not None:
+            # Fitting the knn model indexes the rows; it computes no distances
+            model = clone(model).fit(features)
+        self.model = model
+        for name, value in artifacts.items():
+            setattr(self, name, value)
+        self.data = None
+        self.features = features
+        self.normalized_features = normalized
+        self.game_names = names
+        self.game_platforms = platforms
+        self._build_game_index()
+        self._new_generation()
+
+    def catalog(self):
+        """The current catalog as a FeatureMatrix"""
+        return FeatureMatrix(self.features, self.game_names, self.feature_columns)
+
+    def recommend_by_features(self, features, n_recommendations=5):
+        """Recommend catalog games for one or more processed feature vectors.
+
+        ``features`` is a single vector (returns one recommendation list) or a
+        2-D array of vectors (returns a list per row). Cosine recommenders
+        score every query with a single matmul against the normalized catalog.
+        """
+        with metrics.span('recommend_seconds', model_type=self.model_type, query='features'):
+            return self._search_features(features, n_recommendations)
+
+    def _search_features(self, features, n_recommendations):
+        queries = np.atleast_2d(np.asarray(features, dtype=np.float32))
+
+        if self.model_type == 'knn':
+            n_neighbors = min(n_recommendations, len(self.game_names))
+            scores, indices = self.model.kneighbors(queries, n_neighbors=n_neighbors)
+
+        elif self.model_type in ('cosine', 'cosine_topk'):
+            queries = normalize_rows(queries)
+            indices, scores = top_k(queries @ self.normalized_features.T, n_recommendations)
+
+        elif self.model_type == 'ann':
+            indices, scores = self.ann_index.search(queries, n_recommendations, n_probe=self.n_probe)
+
+        else:
+            raise ValueError("Invalid model type.")
+
+        results = [self._format(row_idx, row_scores) for row_idx, row_scores in zip(indices, scores)]
+        return results[0] if np.ndim(features) == 1 else results
 
     def recommend(self, game_name, n_recommendations=5):
-        if game_name not in self.game_names:
-            raise ValueError("Game not found in the dataset.")
+        """Return up to n (game, score, platform) tuples, best first"""
+        return self.recommend_many([game_name], n_recommendations)[game_name]
+
+    def recommend_many(self, game_names, n_recommendations=5):
+        """Recommend for several seed games with one vectorized search.
 
-        game_idx = self.game_names.index(game_name)
+        Returns a dict mapping each seed name to its recommendation list.
+        Seeds already in the result cache are answered from it; only the
+        rest are searched.
+        """
+        with metrics.span('recommend_seconds', model_type=self.model_type, query='game'):
+            return self._recommend_many(game_names, n_recommendations)
+
+    def _recommend_many(self, game_names, n_recommendations):
+        seeds = list(dict.fromkeys(game_names))
+        if self.result_cache is None:
+            return self._search_many(seeds, n_recommendations)
+
+        results = {}
+        for seed in seeds:
+            cached = self.result_cache.get(self._cache_key(seed), n_recommendations)
+            if cached is not None:
+                results[seed] = cached
+
+        missing = [seed for seed in seeds if seed not in results]
+        if missing:
+            for seed, recommendations in self._search_many(missing, n_recommendations).items():
+                self.result_cache.put(self._cache_key(seed), recommendations, n_recommendations)
+                results[seed] = recommendations
+        return {seed: results[seed] for seed in seeds}
+
+    def _format(self, indices, scores):
+        """Turn one row of search results into (game, score, platform) tuples.
+
+        Probed ANN lists can hold fewer than n games; their -1 padding is
+        skipped.
+        """
+        return [(self.game_names[i], round(float(score), 4), self.game_platforms[i])
+                for i, score in zip(indices, scores) if i >= 0]
+
+    def _cache_key(self, game_name):
+        return (self.generation, self.model_type, self.n_probe, game_name)
+
+    def _search_many(self, seeds, n_recommendations):
+        game_idxs = np.array([self._game_idx(name) for name in seeds], dtype=np.intp)
 
         if self.model_type == 'knn':
+            n_neighbors = min(n_recommendations + 1, len(self.game_names))
             distances, indices = self.model.kneighbors(
-                [self.data.iloc[game_idx].values],
-                n_neighbors=n_recommendations + 1
+                self.features[game_idxs],
+                n_neighbors=n_neighbors
             )
-            recommendations = [(self.game_names[i], round(d, 4)) for i, d in zip(indices[0][1:], distances[0][1:])]
+            results = []
+            for row_idx, row_dist, game_idx in zip(indices, distances, game_idxs):
+                row_idx, row_dist = _drop_query(row_idx, row_dist, game_idx, n_recommendations)
+                results.append(self._format(row_idx, row_dist))
 
         elif self.model_type == 'cosine':
-            sim_scores = list(enumerate(self.similarity_matrix[game_idx]))
-            sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)[1:n_recommendations + 1]
-            recommendations = [(self.game_names[i], round(score, 4)) for i, score in sim_scores]
+            # One row gather, then batched partial top-k skipping each seed itself
+            indices, scores = top_k(self.similarity_matrix[game_idxs], n_recommendations, exclude=game_idxs)
+            results = [self._format(row_idx, row_scores) for row_idx, row_scores in zip(indices, scores)]
+
+        elif self.model_type == 'cosine_topk':
+            # Precomputed neighbours: each lookup is a slice of the graph,
+            # capped at the K neighbours stored per game
+            results = []
+            for game_idx in game_idxs:
+                indices, scores = self.neighbour_graph.neighbours(game_idx)
+                results.append(self._format(indices[:n_recommendations], scores[:n_recommendations]))
+
+        elif self.model_type == 'ann':
+            # Approximate search over the probed inverted lists only
+            indices, scores = self.ann_index.search(self.features[game_idxs], n_recommendations,
+                                                    n_probe=self.n_probe, exclude=game_idxs)
+            results = [self._format(row_idx, row_scores) for row_idx, row_scores in zip(indices, scores)]
 
         else:
             raise ValueError("Invalid model type.")
 
-        return recommendations
+        return dict(zip(seeds, results))
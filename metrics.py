@@ -0,0 +1,174 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implied
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Most recent samples kept per histogram for the rolling percentiles
+WINDOW = 1024
+
+
+class Histogram:
+    """Latency histogram: cumulative buckets plus a rolling window of samples.
+
+    The buckets, sum and count cover the whole process lifetime (what
+    Prometheus expects); the window holds the last ``window`` observations
+    and backs the percentiles shown in the app.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window=WINDOW):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, seconds):
+        self.counts[np.searchsorted(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+        self.recent.append(seconds)
+
+    def summary(self):
+        """Count, lifetime mean and rolling percentiles, in milliseconds"""
+        recent = np.array(self.recent) * 1000
+        return {
+            'count': self.count,
+            'mean_ms': self.sum * 1000 / self.count if self.count else 0.0,
+            'p50_ms': float(np.percentile(recent, 50)) if len(recent) else 0.0,
+            'p95_ms': float(np.percentile(recent, 95)) if len(recent) else 0.0,
+            'p99_ms': float(np.percentile(recent, 99)) if len(recent) else 0.0,
+        }
+
+
+class Metrics:
+    """Thread-safe registry of latency histograms, counters and gauges.
+
+    Metrics are identified by a name plus optional labels, e.g.
+    ``metrics.span('recommend_seconds', model_type='knn')``. Gauges are
+    callables read at export time, so existing stats (result cache, visit
+    writer) are reported without copying them on every update.
+    """
+
+    def __init__(self):
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def observe(self, name, seconds, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def span(self, name, **labels):
+        """Time the enclosed block into the named histogram"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def increment(self, name, amount=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def gauge(self, name, read, **labels):
+        """Register a callable returning the gauge's current value"""
+        with self._lock:
+            self._gauges[self._key(name, labels)] = read
+
+    def snapshot(self):
+        """Histogram summaries, counter values and gauge readings"""
+        with self._lock:
+            histograms = {key: histogram.summary() for key, histogram in self._histograms.items()}
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+        return {
+            'histograms': histograms,
+            'counters': counters,
+            'gauges': {key: _read(read) for key, read in gauges.items()},
+        }
+
+    def prometheus(self):
+        """Everything in the Prometheus text exposition format"""
+        with self._lock:
+            histograms = {key: (histogram.buckets, list(histogram.counts), histogram.sum, histogram.count)
+                          for key, histogram in self._histograms.items()}
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+
+        lines = []
+        typed = set()
+
+        def header(name, kind):
+            if name not in typed:
+                typed.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), (buckets, counts, total, count) in sorted(histograms.items()):
+            header(name, 'histogram')
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + ['+Inf'], counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {total}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+        for (name, labels), value in sorted(counters.items()):
+            header(name, 'counter')
+            lines.append(f"{name}{_labels(labels)} {value}")
+        for (name, labels), read in sorted(gauges.items(), key=lambda item: item[0]):
+            value = _read(read)
+            if value is not None:
+                header(name, 'gauge')
+                lines.append(f"{name}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+
+def _read(read):
+    try:
+        return read()
+    except Exception:
+        return None
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+
+# Shared by every module and session in the process
+metrics = Metrics()
+metrics.describe('artifact_download_seconds', "Time to fetch a model artifact from GCS or the disk cache")
+metrics.describe('artifact_load_seconds', "Time to deserialize a downloaded model artifact")
+metrics.describe('recommend_seconds', "Time to compute recommendations, including result cache lookups")
+metrics.describe('preprocess_seconds', "Time to encode user input into the feature layout")
+metrics.describe('chart_seconds', "Time to build a recommendation chart")
+metrics.describe('mysql_seconds', "Time spent in visitor-count MySQL calls")
+metrics.describe('mysql_errors_total', "Failed visitor-count MySQL calls")
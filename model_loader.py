@@ -0,0 +1,299 @@
+import logging
+import os
+import threading
+import time
+
+from metrics import metrics
+
+# Heavy dependencies (sklearn, pandas, google-cloud, the recommenders) are
+# imported inside the functions below, so importing this module is cheap and
+# the app can render before any of them are loaded.
+
+logger = logging.getLogger(__name__)
+
+BUCKET_NAME = "recommender-2025"
+# Number of artifacts downloaded in parallel at startup
+LOAD_WORKERS = 4
+# Seconds between checks for new artifacts in the bucket; 0 disables reloading
+RELOAD_INTERVAL = float(os.environ.get('MODEL_RELOAD_INTERVAL', 300))
+# Seconds between retries while the startup load keeps failing
+LOAD_RETRY_INTERVAL = float(os.environ.get('MODEL_LOAD_RETRY_INTERVAL', 30))
+# Bucket prefixes holding the artifacts load_models reads
+ARTIFACT_PREFIXES = ('models/', 'data/')
+# Keep the large read-only arrays in host-wide shared memory, so every
+# Streamlit worker process on the host attaches to the same copy
+SHARED_ARTIFACTS = os.environ.get('SHARED_ARTIFACTS', '0') not in ('', '0')
+
+
+def create_gcs_client(service_account_info):
+    """Build a GCS client from service-account credentials"""
+    from google.cloud import storage
+    from google.oauth2 import service_account
+
+    credentials = service_account.Credentials.from_service_account_info(service_account_info)
+    return storage.Client(credentials=credentials)
+
+
+def artifact_generations(client, bucket_name=BUCKET_NAME):
+    """GCS generation of every artifact blob; any upload changes it"""
+    return {blob.name: blob.generation
+            for prefix in ARTIFACT_PREFIXES for blob in client.list_blobs(bucket_name, prefix=prefix)}
+
+
+def _shared_data(store, path, load, memory_mapped):
+    """Load the data artifact as (FeatureMatrix, normalized features) from the shared store.
+
+    A memory-mapped .npy is already shared through the page cache, so only a
+    pickled DataFrame's features are copied into the store.
+    """
+    import numpy as np
+    from game_recommender import FeatureMatrix, normalize_rows
+
+    key = os.path.basename(path)
+    if memory_mapped:
+        matrix = load(path)
+    else:
+        def build():
+            matrix = load(path)
+            return {'features': matrix.features, 'names': np.array(matrix.names, dtype=str),
+                    'columns': np.array(matrix.columns, dtype=str)}
+        arrays = store.get(key, build)
+        matrix = FeatureMatrix(arrays['features'], arrays['names'].tolist(), arrays['columns'].tolist())
+    normalized = store.get(f'{key}-normalized', lambda: {'normalized': normalize_rows(matrix.features)})
+    return matrix, normalized['normalized']
+
+
+def _shared_graph(store, path):
+    """NeighbourGraph whose arrays live in the shared store"""
+    from game_recommender import NeighbourGraph
+
+    def build():
+        graph = NeighbourGraph.load(path)
+        return {'indptr': graph.indptr, 'indices': graph.indices, 'scores': graph.scores}
+    return NeighbourGraph(**store.get(os.path.basename(path), build))
+
+
+def load_models(client, bucket_name=BUCKET_NAME, shared=SHARED_ARTIFACTS):
+    """Load all necessary models and data files from GCS.
+
+    Returns the dict the Recommend page works with (recommenders, encoder,
+    game tables and per-artifact load timings). With ``shared``, the model,
+    similarity data, features and games.csv are attached from host-wide
+    shared memory instead of being loaded into this process.
+    """
+    import joblib
+    import pandas as pd
+    from artifact_registry import registry
+    from feature_encoder import FeatureEncoder
+    from game_details import GameDetailIndex
+    from game_recommender import (GameRecommender, NeighbourGraph, open_similarity_matrix, open_feature_matrix,
+                                  feature_matrix_from_frame)
+
+    bucket = client.bucket(bucket_name)
+    load_pickle = joblib.load
+    # Shared-mode loaders produce different objects (a (features, normalized)
+    # pair, SharedFrame, memory-mapped pickles), so the registry keeps them
+    # apart from what other callers load for the same blobs
+    variant = 'shared' if shared else None
+    if shared:
+        from shared_store import SharedArrayStore, SharedFrame
+        store = SharedArrayStore()
+        # Arrays inside uncompressed pickles are memory-mapped straight from
+        # the artifact cache file, which every process shares via the page cache
+        load_pickle = lambda path: joblib.load(path, mmap_mode='r')
+
+    # Prefer the top-K neighbour graph, then the memory-mapped similarity
+    # matrix, and fall back to the pickled matrix
+    if bucket.blob('models/cosine_topk_graph.npz').exists():
+        cosine_type = 'cosine_topk'
+        cosine_artifact = ('models/cosine_topk_graph.npz',
+                           (lambda path: _shared_graph(store, path)) if shared else NeighbourGraph.load, variant)
+    elif bucket.blob('models/cosine_sim_matrix.npy').exists():
+        cosine_type = 'cosine'
+        cosine_artifact = ('models/cosine_sim_matrix.npy', lambda path: open_similarity_matrix(
+            path, registry.cache.fetch(bucket.blob('models/cosine_sim_matrix.json'))))
+    else:
+        cosine_type = 'cosine'
+        cosine_artifact = ('models/cosine_sim_matrix.pkl', load_pickle, variant)
+
+    # Prefer the columnar feature matrix over the pickled DataFrame
+    memory_mapped = bucket.blob('models/game_features.npy').exists()
+    if memory_mapped:
+        data_artifact = ('models/game_features.npy', lambda path: open_feature_matrix(
+            path, registry.cache.fetch(bucket.blob('models/game_features.json'))))
+    else:
+        data_artifact = ('models/game_data_processed.pkl', lambda path: feature_matrix_from_frame(joblib.load(path)))
+    games_loader = pd.read_csv
+    if shared:
+        data_path, load_data = data_artifact
+        data_artifact = (data_path, lambda path: _shared_data(store, path, load_data, memory_mapped), variant)
+        games_loader = lambda path: SharedFrame.share(store, os.path.basename(path), lambda: pd.read_csv(path))
+
+    # Load every artifact once through the shared registry; downloads run
+    # concurrently and each one is deserialized as soon as it arrives
+    artifacts, timings = registry.load_many(bucket, {
+        'model': ('models/game_recommender_knn_model.pkl', load_pickle, variant),
+        'data': data_artifact,
+        'cosine': cosine_artifact,
+        'scaler': ('models/minmax_scaler.pkl', joblib.load),
+        'one_hot_columns': ('models/one_hot_columns.pkl', joblib.load),
+        'game_names': ('models/game_names.pkl', joblib.load),
+        'complete_game_data': ('data/games.csv', games_loader, variant),
+    }, max_workers=LOAD_WORKERS)
+    for name, timing in timings.items():
+        logger.info("Loaded %s: download %.2fs, load %.2fs", name, timing['download'], timing['load'])
+
+    data, normalized = artifacts['data'] if shared else (artifacts['data'], None)
+    if shared:
+        # Entries of earlier uploads are no longer needed by new attachments
+        store.prune(registry.content_keys())
+
+    # Load recommenders; both share the same model and data objects
+    knn_rec = GameRecommender(model_type='knn')
+    knn_rec.load_from_objects(artifacts['model'], data)
+
+    cosine_rec = GameRecommender(model_type=cosine_type)
+    if cosine_type == 'cosine_topk':
+        cosine_rec.load_from_objects(artifacts['model'], data, neighbour_graph=artifacts['cosine'],
+                                     normalized_features=normalized)
+    else:
+        cosine_rec.load_from_objects(artifacts['model'], data, similarity_matrix=artifacts['cosine'],
+                                     normalized_features=normalized)
+
+    scaler = artifacts['scaler']
+    one_hot_columns = artifacts['one_hot_columns']
+    complete_game_data = artifacts['complete_game_data']
+
+    return {
+        'knn_recommender': knn_rec,
+        'cosine_recommender': cosine_rec,
+        'scaler': scaler,
+        'one_hot_columns': one_hot_columns,
+        'feature_encoder': FeatureEncoder(one_hot_columns, scaler),
+        'game_names': artifacts['game_names'],
+        'complete_game_data': complete_game_data,
+        'game_details': GameDetailIndex(complete_game_data),
+        'load_timings': timings
+    }
+
+
+class BackgroundLoad:
+    """Run the model load once per process in a daemon thread.
+
+    ``state`` is 'idle', 'loading', 'ready' or 'failed'. Pages can show it
+    while the load runs and call ``result`` when they need the models.
+
+    Once loaded, the same thread keeps polling the bucket every
+    ``reload_interval`` seconds. When any artifact's generation changes it
+    loads a complete new set alongside the current one (unchanged artifacts
+    are shared through the registry) and swaps it in with a single reference
+    assignment. Callers that already hold a set keep using it, so a script
+    run that started before the swap finishes on the old generation. A failed
+    reload keeps serving the current set.
+
+    A failed startup load (e.g. a transient GCS error) is retried every
+    ``retry_interval`` seconds; the state stays 'failed' with ``error`` set
+    until a retry succeeds.
+    """
+
+    def __init__(self, reload_interval=RELOAD_INTERVAL, retry_interval=LOAD_RETRY_INTERVAL):
+        self.state = 'idle'
+        self.error = None
+        self.reload_interval = reload_interval
+        self.retry_interval = retry_interval
+        # Number of the set being served (1 = startup load) and its blob generations
+        self.version = 0
+        self.generations = None
+        self.loaded_at = None
+        self.reload_error = None
+        self._result = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self, service_account_info, bucket_name=BUCKET_NAME):
+        """Start loading unless a load is already running or finished"""
+        with self._lock:
+            if self.state != 'idle':
+                return
+            self.state = 'loading'
+        thread = threading.Thread(target=self._run, args=(dict(service_account_info), bucket_name),
+                                  name='model-loader', daemon=True)
+        thread.start()
+
+    def _run(self, service_account_info, bucket_name):
+        client = None
+        while self._result is None:
+            try:
+                if client is None:
+                    client = create_gcs_client(service_account_info)
+                self._load(client, bucket_name)
+            except Exception as e:
+                logger.exception("Model loading failed; retrying in %.0fs", self.retry_interval)
+                self.error = e
+                self.state = 'failed'
+                metrics.increment('model_load_errors_total')
+            finally:
+                self._done.set()
+            if self._result is None:
+                time.sleep(self.retry_interval)
+
+        while self.reload_interval > 0:
+            time.sleep(self.reload_interval)
+            self.reload_if_changed(client, bucket_name)
+
+    def _load(self, client, bucket_name):
+        # Read the generations first: an upload during the load is then
+        # picked up by the next check instead of being missed
+        generations = artifact_generations(client, bucket_name)
+        result = load_models(client, bucket_name)
+        # Publish the set and clear a startup failure in one step, so
+        # readers never see the new set alongside the old error
+        with self._lock:
+            previous, self._result = self._result, result
+            self.error = None
+            self.state = 'ready'
+            self.generations = generations
+            self.version += 1
+            self.loaded_at = time.time()
+
+        if previous is not None:
+            # Results of the old set can no longer be requested
+            for name in ('knn_recommender', 'cosine_recommender'):
+                recommender = previous[name]
+                if recommender.result_cache is not None:
+                    recommender.result_cache.invalidate(recommender.generation)
+
+    def reload_if_changed(self, client, bucket_name=BUCKET_NAME):
+        """Load and swap in a new set if the bucket changed; returns True if swapped"""
+        try:
+            if artifact_generations(client, bucket_name) == self.generations:
+                return False
+            logger.info("Model artifacts changed; loading version %d", self.version + 1)
+            self._load(client, bucket_name)
+            self.reload_error = None
+            logger.info("Now serving model version %d", self.version)
+            metrics.increment('model_reloads_total')
+            return True
+        except Exception as e:
+            logger.exception("Model reload failed; still serving version %d", self.version)
+            self.reload_error = e
+            metrics.increment('model_reload_errors_total')
+            return False
+
+    def wait(self, timeout=None):
+        """Block until the load finishes; returns False on timeout"""
+        return self._done.wait(timeout)
+
+    def result(self, timeout=None):
+        """Wait for the load; raises the loading error if it failed"""
+        if not self.wait(timeout):
+            raise TimeoutError("Models are still loading.")
+        with self._lock:
+            if self._result is None:
+                raise self.error
+            return self._result
+
+
+# Shared by every session in the process
+startup = BackgroundLoad()
+metrics.gauge('model_version', lambda: startup.version)
@@ -1,4 +1,16 @@
 from pages.about import about_page
 from pages.tutorial import tutorial_page
 from pages.home import home_page
-from pages.recommend import recommend_page
+
+
+def recommend_page():
+    """Import the Recommend page, and with it the models, on first use"""
+    import streamlit as st
+    from model_loader import startup
+
+    if startup.state == 'loading':
+        with st.spinner("Loading recommendation models..."):
+            startup.wait()
+
+    from pages.recommend import recommend_page as page
+    page()
@@ -1,9 +1,14 @@
 import streamlit as st
 from backend import *
-import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 
 def recommend_page():
+    # Use one model set for the whole run, even if a reload swaps in a new one
+    data_models = load_models_and_data()
+    if not data_models:
+        st.stop()
+    knn_recommender = data_models['knn_recommender']
+    cosine_recommender = data_models['cosine_recommender']
+
     st.title("🎮 Game Recommendation System")
     st.write("Get game recommendations based on your favorite title or custom game features!")
 
@@ -51,7 +56,7 @@ def recommend_page():
                     st.toast("Recommendation processed",icon=":material/manufacturing:")
                     st.success("Here are your recommendations:")
                     
-                    display_recommendations(recommendations,selected_game)
+                    display_recommendations(recommendations,selected_game,data_models)
                         
                 except ValueError as e:
                     st.error(str(e))
@@ -112,30 +117,15 @@ def recommend_page():
                 
                 try:
                     # Preprocess the input
-                    processed_features = preprocess_user_input(user_input)
+                    processed_features = preprocess_user_input(user_input, data_models)
                     
                     # Get recommendations
                     recommender = knn_recommender if "KNN" in model_choice_custom else cosine_recommender
-                    
-                    if model_choice_custom == 'KNN (Euclidean)':
-                        # For KNN, we need to use the model directly
-                        distances, indices = recommender.model.kneighbors(
-                            [processed_features],
-                            n_neighbors=num_recs_custom + 1
-                        )
-                        recommendations = [(recommender.game_names[i], round(d, 4)) 
-                                        for i, d in zip(indices[0][1:], distances[0][1:])]
-                    else:
-                        # For cosine similarity, we need to compute similarity with all games
-                        game_features = recommender.data.values
-                        similarity_scores = cosine_similarity([processed_features], game_features)[0]
-                        top_indices = np.argsort(similarity_scores)[-num_recs_custom-1:-1][::-1]
-                        recommendations = [(recommender.game_names[i], round(similarity_scores[i], 4)) 
-                                        for i in top_indices]
+                    recommendations = recommender.recommend_by_features(processed_features, num_recs_custom)
                     
                     st.toast("Recommendation processed",icon=":material/manufacturing:")
                     st.success("Here are your recommendations:")
-                    display_recommendations(recommendations,name)
+                    display_recommendations(recommendations,name,data_models)
                     
                 except ValueError as e:
                     st.error(str(e))
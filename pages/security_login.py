@@ -1,5 +1,12 @@
 import pymysql
+import queue
+from contextlib import contextmanager
 import streamlit as st
+from visit_log import VisitLogWriter
+from metrics import metrics
+
+# Seconds between re-reads of the visitor total from the database
+COUNT_TTL = 60
 
 def initialize_database():
     try:
@@ -30,6 +37,10 @@ def initialize_database():
         """
         mycursor.execute(query4)
         mydb.commit()
+
+        # Single-row running total, so reading the count is a key lookup
+        create_counter_table(mycursor)
+        mydb.commit()
         st.success(f"Database '{db}' and tables created successfully.")
         return mydb, mycursor
 
@@ -43,24 +54,77 @@ def connect_to_db():
     return pymysql.connect(host=mysql_config["host"], user=mysql_config["user"], password=mysql_config["password"],
                             port=mysql_config["port"], database="Recommender", ssl={"ssl_disabled": True})
 
+def create_counter_table(cursor):
+    """Create the VisitorCounter row, seeded once from the existing visits"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS VisitorCounter (
+        Id TINYINT PRIMARY KEY,
+        Total BIGINT NOT NULL
+    )
+    """)
+    cursor.execute("SELECT Total FROM VisitorCounter WHERE Id = 1")
+    if cursor.fetchone() is None:
+        cursor.execute("INSERT IGNORE INTO VisitorCounter (Id, Total) SELECT 1, COUNT(*) FROM Visitor")
+
+class ConnectionPool:
+    """Small thread-safe pool of reusable database connections"""
+
+    def __init__(self, connect, size=4):
+        self._connect = connect
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+            conn.ping(reconnect=True)
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        except Exception:
+            # Don't hand a connection in an unknown state to the next caller
+            conn.close()
+            raise
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+def prepare_counter(conn):
+    with conn.cursor() as cursor:
+        create_counter_table(cursor)
+    conn.commit()
+
+@st.cache_resource
+def get_pool():
+    """Process-wide connection pool; connections are opened on first use"""
+    return ConnectionPool(connect_to_db)
+
+@st.cache_resource
+def get_visit_writer():
+    """Process-wide write-behind logger that records visits off the script thread.
+
+    The counter table is ensured on the writer's thread too, so no session
+    ever waits on MySQL.
+    """
+    writer = VisitLogWriter(get_pool().connection, refresh_interval=COUNT_TTL, prepare=prepare_counter).start()
+    metrics.gauge('visits_pending', lambda: writer.pending)
+    metrics.gauge('visits_written', lambda: writer.written)
+    metrics.gauge('visits_dropped', lambda: writer.dropped)
+    return writer
+
 def update_visitor_count():
-    conn4 = connect_to_db()
-    cursor4 = conn4.cursor()
-    
-    # Only add a new visitor if it's the first access on a non-home page
-    if st.session_state.get("first_access", False):
-        if st.session_state.current_page != "Home":
-            query = "INSERT INTO Visitor (Timestamp) VALUES (NOW())"
-            cursor4.execute(query)
-            conn4.commit()
-            st.session_state.first_access = False
-
-    # Count the number of visitors
-    query = "SELECT COUNT(*) FROM Visitor"
-    cursor4.execute(query)
-    result = cursor4.fetchone()
-    conn4.close()
-    return result[0]
+    writer = get_visit_writer()
+
+    # Only add a new visitor if it's the first access on a non-home page;
+    # the visit is queued and written to MySQL in the background
+    if st.session_state.get("first_access", False) and st.session_state.current_page != "Home":
+        writer.record()
+        st.session_state.first_access = False
+
+    # Last known total plus queued visits; None until the first read completes
+    return writer.visitor_count()
 
 # Initialize the database when the script is run
 if __name__ == "__main__":
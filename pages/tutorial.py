@@ -1,5 +1,4 @@
 import streamlit as st
-from backend import init_gcs_client
 
 def tutorial_page():
     st.title("Tutorials Page")
@@ -7,7 +6,13 @@ def tutorial_page():
     
     from datetime import  timedelta
     import os
-    client = init_gcs_client()
+    # Built here rather than through backend, which would load the models
+    from model_loader import create_gcs_client
+    try:
+        client = create_gcs_client(st.secrets["gcp_service_account"])
+    except Exception as e:
+        st.error(f"Failed to initialize GCS client: {str(e)}")
+        client = None
     def generate_signed_url(blob_name, expiration_minutes=30):
         """Generate a signed URL for temporary access to a GCS object"""
         if not client:
@@ -0,0 +1,88 @@
+import threading
+from collections import OrderedDict
+from metrics import metrics
+
+
+class RecommendationCache:
+    """Thread-safe, size-bounded LRU cache of recommendation lists.
+
+    Entries are keyed by ``(generation, model_type, n_probe, game)`` and hold
+    the longest list computed so far for that game, so a request for fewer
+    recommendations is answered by slicing a cached longer one. Generations
+    change whenever a recommender loads new artifacts, which makes old
+    entries unreachable; ``invalidate`` drops them eagerly.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, n):
+        """Return the first n recommendations for key, or None on a miss"""
+        with self._lock:
+            recommendations = self._entries.get(key)
+            if recommendations is None or (len(recommendations) < n and not recommendations.complete):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(recommendations[:n])
+
+    def put(self, key, recommendations, n):
+        """Store the result of a request for n recommendations"""
+        # Fewer results than asked for means the list is exhaustive for any
+        # larger n too (e.g. a cosine_topk row or a tiny catalog)
+        entry = _Entry(recommendations, complete=len(recommendations) < n)
+        with self._lock:
+            current = self._entries.get(key)
+            if current is not None and (current.complete or len(current) >= len(entry)):
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, generation):
+        """Drop every entry produced by one model generation"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == generation]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+class _Entry(tuple):
+    """Cached recommendation list that remembers whether it is exhaustive"""
+
+    def __new__(cls, recommendations, complete):
+        entry = super().__new__(cls, recommendations)
+        entry.complete = complete
+        return entry
+
+
+# Shared by every recommender in the process
+result_cache = RecommendationCache()
+metrics.gauge('result_cache_size', lambda: result_cache.stats()['size'])
+metrics.gauge('result_cache_hits', lambda: result_cache.hits)
+metrics.gauge('result_cache_misses', lambda: result_cache.misses)
+metrics.gauge('result_cache_hit_ratio', lambda: result_cache.stats()['hit_rate'])
@@ -0,0 +1,286 @@
+"""Headless HTTP recommendation service.
+
+Serves the same recommenders as the Streamlit app, loaded with
+model_loader.load_models, as JSON endpoints:
+
+    GET  /health
+    GET  /metrics                      Prometheus text format
+    POST /recommend/game               {"game": "Wii Sports", "n": 5, "model": "knn"}
+    POST /recommend/features           {"features": {<Recommend page form fields>}, "n": 5, "model": "cosine"}
+
+``model`` is "knn" (default) or "cosine". Requests that arrive within a few
+milliseconds of each other are micro-batched into one vectorized search.
+
+    python service.py --credentials service_account.json --port 8000
+    python service.py --synthetic 50000          # local testing without GCS
+"""
+import argparse
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from metrics import metrics
+from model_loader import BUCKET_NAME, create_gcs_client, load_models
+
+logger = logging.getLogger(__name__)
+
+# Longest a request waits for others to share its batch, and the batch cap
+MAX_WAIT = 0.002
+MAX_BATCH = 256
+
+
+class MicroBatcher:
+    """Collect concurrent requests into batches for one vectorized call.
+
+    ``submit(group, item)`` returns a Future. A worker thread takes the first
+    waiting request, keeps collecting for up to ``max_wait`` seconds or
+    ``max_batch`` items, then calls ``handle(group, items)`` once per group
+    (e.g. one per model and n) and resolves each Future with its result.
+    ``handle`` returns one result per item, in order.
+    """
+
+    def __init__(self, handle, max_wait=MAX_WAIT, max_batch=MAX_BATCH, name='micro-batcher'):
+        self.handle = handle
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self._pending = []
+        self._ready = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, group, item):
+        future = Future()
+        with self._ready:
+            self._pending.append((group, item, future))
+            self._ready.notify()
+        return future
+
+    def _take_batch(self):
+        with self._ready:
+            while not self._pending:
+                self._ready.wait()
+            deadline = time.monotonic() + self.max_wait
+            while len(self._pending) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._ready.wait(remaining)
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        return batch
+
+    def _run(self):
+        while True:
+            groups = {}
+            for group, item, future in self._take_batch():
+                groups.setdefault(group, []).append((item, future))
+
+            for group, requests in groups.items():
+                metrics.increment('service_batches_total')
+                metrics.increment('service_batched_requests_total', len(requests))
+                try:
+                    results = self.handle(group, [item for item, _ in requests])
+                except Exception as e:
+                    for _, future in requests:
+                        future.set_exception(e)
+                    continue
+                for (_, future), result in zip(requests, results):
+                    future.set_result(result)
+
+
+class Server(ThreadingHTTPServer):
+    # Room for bursts of concurrent clients; the default backlog is 5
+    request_queue_size = 1024
+
+
+class RecommendationService:
+    """Batched by-game and by-features lookups over the loaded models"""
+
+    def __init__(self, data_models, max_wait=MAX_WAIT, max_batch=MAX_BATCH):
+        self.recommenders = {'knn': data_models['knn_recommender']}
+        if data_models.get('cosine_recommender') is not None:
+            self.recommenders['cosine'] = data_models['cosine_recommender']
+        self.feature_encoder = data_models['feature_encoder']
+        self.n_games = len(self.recommenders['knn'].game_names)
+        self.by_game = MicroBatcher(self._recommend_games, max_wait, max_batch, name='batch-by-game')
+        self.by_features = MicroBatcher(self._recommend_features, max_wait, max_batch, name='batch-by-features')
+
+    def recommender(self, model):
+        recommender = self.recommenders.get(model)
+        if recommender is None:
+            raise ValueError(f"Unknown model '{model}', expected one of {sorted(self.recommenders)}.")
+        return recommender
+
+    def _recommend_games(self, group, game_names):
+        model, n = group
+        results = self.recommenders[model].recommend_many(game_names, n)
+        return [results[name] for name in game_names]
+
+    def _recommend_features(self, group, rows):
+        model, n = group
+        return self.recommenders[model].recommend_by_features(np.vstack(rows), n)
+
+    def recommend_game(self, game, n=5, model='knn'):
+        # Unknown titles are rejected up front so they cannot fail a whole batch
+        if game not in self.recommender(model).game_index:
+            raise LookupError("Game not found in the dataset.")
+        return self.by_game.submit((model, n), game).result()
+
+    def recommend_features(self, user_input, n=5, model='knn'):
+        self.recommender(model)
+        # Likewise, bad inputs fail here rather than inside a shared batch
+        for col in self.feature_encoder.numerical_cols:
+            # bool is an int subclass, but true/false is not a number
+            value = user_input.get(col)
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"'{col}' must be a number.")
+        # Encode here so a value that is not finite once scaled to float32
+        # (NaN, inf, 1e308) is rejected before it can join a batch
+        with np.errstate(over='ignore', invalid='ignore'):
+            row = self.feature_encoder.encode(user_input)
+        if not np.isfinite(row).all():
+            raise ValueError("Numeric features must be finite numbers within range.")
+        return self.by_features.submit((model, n), row).result()
+
+
+def _reject_constant(name):
+    raise ValueError(f"{name} is not a valid number.")
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send_json(200, {'status': 'ok', 'games': service.n_games})
+            elif self.path == '/metrics':
+                self._send(200, metrics.prometheus().encode(), 'text/plain; version=0.0.4')
+            else:
+                self._send_json(404, {'error': "Not found."})
+
+        def do_POST(self):
+            routes = {'/recommend/game': self._by_game, '/recommend/features': self._by_features}
+            route = routes.get(self.path)
+            if route is None:
+                self._send_json(404, {'error': "Not found."})
+                return
+
+            with metrics.span('service_request_seconds', endpoint=self.path):
+                try:
+                    length = int(self.headers.get('Content-Length', 0))
+                    body = json.loads(self.rfile.read(length) or b'{}', parse_constant=_reject_constant)
+                    if not isinstance(body, dict):
+                        raise ValueError("The request body must be a JSON object.")
+                    n = body.get('n', 5)
+                    if isinstance(n, bool) or not isinstance(n, int) or not 1 <= n <= 100:
+                        raise ValueError("n must be an integer between 1 and 100.")
+                    recommendations = route(body, n, body.get('model', 'knn'))
+                except LookupError as e:
+                    self._send_json(404, {'error': str(e.args[0] if e.args else e)})
+                    return
+                except (ValueError, TypeError) as e:
+                    self._send_json(400, {'error': str(e)})
+                    return
+                self._send_json(200, {'recommendations': [
+                    {'game': game, 'score': score, 'platform': platform}
+                    for game, score, platform in recommendations
+                ]})
+
+        def _by_game(self, body, n, model):
+            if not isinstance(body.get('game'), str):
+                raise ValueError("'game' must be a game title.")
+            return service.recommend_game(body['game'], n, model)
+
+        def _by_features(self, body, n, model):
+            user_input = body.get('features')
+            if not isinstance(user_input, dict):
+                raise ValueError("'features' must be an object of game attributes.")
+            return service.recommend_features(user_input, n, model)
+
+        def _send_json(self, status, payload):
+            try:
+                body = json.dumps(payload, allow_nan=False)
+            except ValueError:
+                logger.error("Response is not valid JSON: %r", payload)
+                status, body = 500, json.dumps({'error': "Could not encode the recommendations."})
+            self._send(status, body.encode(), 'application/json')
+
+        def _send(self, status, body, content_type):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(format, *args)
+
+    return Handler
+
+
+def load_synthetic(n_games, seed=0, max_dense=20000):
+    """Model dict shaped like load_models' result, built from a synthetic catalog.
+
+    The cosine recommender needs the dense n x n matrix, so it is only
+    included up to ``max_dense`` games.
+    """
+    from sklearn.neighbors import NearestNeighbors
+    from game_recommender import GameRecommender, normalize_rows
+    from synthetic_catalog import make_catalog, make_encoder, make_user_inputs
+
+    catalog = make_catalog(n_games, seed=seed)
+    model = NearestNeighbors(metric='euclidean').fit(catalog.features)
+    knn_rec = GameRecommender(model_type='knn')
+    knn_rec.load_from_objects(model, catalog)
+    cosine_rec = None
+    if n_games <= max_dense:
+        normalized = normalize_rows(catalog.features)
+        cosine_rec = GameRecommender(model_type='cosine')
+        cosine_rec.load_from_objects(model, catalog, similarity_matrix=normalized @ normalized.T)
+    return {
+        'knn_recommender': knn_rec,
+        'cosine_recommender': cosine_rec,
+        'feature_encoder': make_encoder(make_user_inputs(1000, seed=seed)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--credentials', help="GCS service-account JSON file (default: application credentials)")
+    parser.add_argument('--bucket', default=BUCKET_NAME)
+    parser.add_argument('--synthetic', type=int, help="Serve a synthetic catalog of this size instead of GCS models")
+    parser.add_argument('--max-wait-ms', type=float, default=MAX_WAIT * 1000,
+                        help="How long a request waits for others to share its batch")
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    if args.synthetic:
+        data_models = load_synthetic(args.synthetic)
+    elif args.credentials:
+        with open(args.credentials) as f:
+            data_models = load_models(create_gcs_client(json.load(f)), args.bucket)
+    else:
+        from google.cloud import storage
+        data_models = load_models(storage.Client(), args.bucket)
+
+    service = RecommendationService(data_models, args.max_wait_ms / 1000, args.max_batch)
+    server = Server((args.host, args.port), make_handler(service))
+    logger.info("Serving recommendations on http://%s:%d", args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
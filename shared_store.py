@@ -0,0 +1,194 @@
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent builders race, the loser's copy is discarded
+    fcntl = None
+
+# POSIX shared memory (tmpfs) where available, otherwise a regular directory
+# whose files are shared through the page cache
+DEFAULT_SHARED_DIR = os.environ.get(
+    'SHARED_ARTIFACT_DIR',
+    '/dev/shm/game_recommender' if os.path.isdir('/dev/shm') else os.path.join(tempfile.gettempdir(),
+                                                                                'game_recommender_shared'))
+# Entries attached to within this many seconds are never pruned, so workers
+# still loading or serving an earlier upload do not have to rebuild them
+PRUNE_GRACE_SECONDS = float(os.environ.get('SHARED_ARTIFACT_PRUNE_GRACE', 600))
+
+
+class SharedArrayStore:
+    """Read-only arrays shared by every process on the host.
+
+    Each entry is a directory of .npy files named by a content key (e.g. the
+    artifact cache key of the blob it came from). The first process to ask
+    for a key builds it under an exclusive file lock; every process then
+    memory-maps the files read-only, so their pages exist once per host
+    however many Streamlit workers attach.
+    """
+
+    def __init__(self, root=DEFAULT_SHARED_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def get(self, key, build):
+        """Return ``{name: read-only array}`` for key, calling ``build()`` once per host.
+
+        ``build`` returns a dict of arrays; object (string) arrays are stored
+        as fixed-width unicode.
+        """
+        path = os.path.join(self.root, key)
+        # Attach under the entry's lock too, so prune cannot remove it midway
+        with self._lock(key):
+            if not os.path.isdir(path):
+                self._write(path, build())
+            # Mark the entry as in use for prune
+            os.utime(path)
+            return {os.path.splitext(name)[0]: np.load(os.path.join(path, name), mmap_mode='r')
+                    for name in sorted(os.listdir(path)) if name.endswith('.npy')}
+
+    def _write(self, path, arrays):
+        # Build next to the final name and rename, so readers never see a
+        # partial entry
+        tmp_path = tempfile.mkdtemp(dir=self.root, prefix='.building-')
+        try:
+            for name, array in arrays.items():
+                array = np.asarray(array)
+                if array.dtype == object:
+                    array = array.astype(str)
+                np.save(os.path.join(tmp_path, f'{name}.npy'), np.ascontiguousarray(array))
+            os.rename(tmp_path, path)
+        except OSError:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            if not os.path.isdir(path):
+                raise
+
+    def _lock_path(self, key):
+        return os.path.join(self.root, f'.{key}.lock')
+
+    @contextmanager
+    def _lock(self, key, blocking=True):
+        """Exclusive lock on one entry; yields False if not blocking and it is held"""
+        if fcntl is None:
+            yield True
+            return
+        lock_path = self._lock_path(key)
+        while True:
+            lock_file = open(lock_path, 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                yield False
+                return
+            # prune deletes lock files while holding them; if that happened
+            # while we waited, this lock is on a dead file, so take a new one
+            try:
+                current = os.stat(lock_path).st_ino == os.fstat(lock_file.fileno()).st_ino
+            except FileNotFoundError:
+                current = False
+            if current:
+                break
+            lock_file.close()
+        try:
+            yield True
+        finally:
+            lock_file.close()
+
+    def prune(self, keep, grace=PRUNE_GRACE_SECONDS):
+        """Delete entries whose key is not in keep.
+
+        Entries derived from a key (e.g. ``<key>-normalized``) go with it.
+        Entries that another process is building or attaching to, or that
+        were attached to within ``grace`` seconds, are left alone: a sibling
+        worker may still be loading the set they belong to. Processes that
+        still map a deleted entry keep their pages until they drop it. The
+        lock file of a deleted entry is removed with it.
+        """
+        now = time.time()
+        names = set()
+        for name in os.listdir(self.root):
+            if name.startswith('.') and name.endswith('.lock'):
+                names.add(name[1:-len('.lock')])
+            elif not name.startswith('.'):
+                names.add(name)
+        for name in names:
+            if name.partition('-')[0] in keep:
+                continue
+            path = os.path.join(self.root, name)
+            with self._lock(name, blocking=False) as locked:
+                if not locked:
+                    continue
+                try:
+                    if now - os.stat(path).st_mtime < grace:
+                        continue
+                except FileNotFoundError:
+                    pass
+                shutil.rmtree(path, ignore_errors=True)
+                # Removed while still held, so waiting lockers notice and retry
+                if fcntl is not None and not os.path.exists(path):
+                    os.remove(self._lock_path(name))
+
+
+class SharedFrame:
+    """Read-only table of shared column arrays with the DataFrame bits the app uses.
+
+    Columns are memory-mapped; ``iloc[rows]`` materializes only the
+    requested rows as a DataFrame. Missing text values are kept in a
+    separate mask, since fixed-width strings cannot hold NaN.
+    """
+
+    def __init__(self, arrays):
+        self.columns = [str(name) for name in arrays['_columns']]
+        self._arrays = arrays
+        self.iloc = _RowIndexer(self)
+
+    @classmethod
+    def share(cls, store, key, load_frame):
+        """Attach to the shared copy of a DataFrame, calling ``load_frame()`` once per host"""
+        def build():
+            frame = load_frame()
+            arrays = {'_columns': np.array(frame.columns, dtype=str)}
+            for i, column in enumerate(frame.columns):
+                values = frame[column]
+                # Text columns (object or pandas' string dtype)
+                if values.dtype.kind == 'O':
+                    arrays[f'{i}_null'] = values.isna().to_numpy()
+                    values = values.fillna('').astype(str)
+                arrays[str(i)] = values.to_numpy()
+            return arrays
+        return cls(store.get(key, build))
+
+    def __len__(self):
+        return len(self._arrays['0']) if self.columns else 0
+
+    def __getitem__(self, column):
+        return self._column(self.columns.index(column))
+
+    def _column(self, i, rows=slice(None)):
+        values = self._arrays[str(i)][rows]
+        null = self._arrays.get(f'{i}_null')
+        if null is None:
+            return values
+        values = values.astype(object)
+        values[null[rows]] = np.nan
+        return values
+
+    def take(self, rows):
+        rows = np.asarray(rows, dtype=np.intp)
+        return pd.DataFrame({column: self._column(i, rows) for i, column in enumerate(self.columns)},
+                            index=rows)
+
+
+class _RowIndexer:
+    def __init__(self, frame):
+        self.frame = frame
+
+    def __getitem__(self, rows):
+        return self.frame.take(rows)
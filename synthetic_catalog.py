@@ -0,0 +1,78 @@
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+from game_recommender import FeatureMatrix
+from feature_encoder import FeatureEncoder, NUMERICAL_COLS
+
+PLATFORMS = ['Wii', 'PS3', 'X360', 'PS2', 'DS', 'PS4', 'PS', 'XB', 'PSP', 'PC', '3DS']
+GENRES = ['Action', 'Adventure', 'Fighting', 'Misc', 'Platform', 'Puzzle', 'Racing', 'Role-Playing',
+          'Shooter', 'Simulation', 'Sports', 'Strategy']
+RATINGS = ['E', 'E10+', 'T', 'M', 'RP']
+YEARS = [str(year) for year in range(1980, 2020)]
+N_PUBLISHERS = 247
+
+
+def categories():
+    """Categorical value lists, keyed by the raw input column they encode"""
+    return {
+        'Platform': PLATFORMS,
+        'Year_of_Release': YEARS,
+        'Genre': GENRES,
+        'Publisher': [f"Publisher {i}" for i in range(N_PUBLISHERS)],
+        'Rating': RATINGS,
+    }
+
+
+def one_hot_columns():
+    """One-hot column labels in the same '<column>_<value>' form as get_dummies"""
+    return [f"{column}_{value}" for column, values in categories().items() for value in values]
+
+
+def make_catalog(n_games, seed=0):
+    """Generate a processed catalog shaped like the real one.
+
+    320 features: the five MinMax-scaled numerical columns (long-tailed sales,
+    bell-shaped user score) followed by one active one-hot per categorical
+    group, with skewed category frequencies.
+    """
+    rng = np.random.default_rng(seed)
+    columns = list(NUMERICAL_COLS) + one_hot_columns()
+    features = np.zeros((n_games, len(columns)), dtype=np.float32)
+
+    sales = rng.lognormal(mean=-2.0, sigma=1.2, size=(n_games, 4))
+    features[:, :4] = sales / sales.max(axis=0)
+    features[:, 4] = np.clip(rng.normal(0.7, 0.15, size=n_games), 0, 1)
+
+    offset = len(NUMERICAL_COLS)
+    rows = np.arange(n_games)
+    for values in categories().values():
+        # Zipf-like popularity so a few platforms/publishers dominate
+        weights = 1.0 / np.arange(1, len(values) + 1)
+        choice = rng.choice(len(values), size=n_games, p=weights / weights.sum())
+        features[rows, offset + choice] = 1
+        offset += len(values)
+
+    names = [f"Game {i}" for i in range(n_games)]
+    return FeatureMatrix(features, names, columns)
+
+
+def make_user_inputs(n_inputs, seed=0):
+    """Generate raw input dicts like the ones the Recommend page form builds"""
+    rng = np.random.default_rng(seed)
+    values = categories()
+    inputs = []
+    for i in range(n_inputs):
+        user_input = {'Name': f"Custom Game {i}"}
+        for column, options in values.items():
+            user_input[column] = options[rng.integers(len(options))]
+        user_input['Year_of_Release'] = int(user_input['Year_of_Release'])
+        for column in NUMERICAL_COLS[:4]:
+            user_input[column] = float(rng.lognormal(mean=-1.0, sigma=1.0))
+        user_input['User_Score'] = float(np.clip(rng.normal(7.0, 1.5), 0, 10))
+        inputs.append(user_input)
+    return inputs
+
+
+def make_encoder(user_inputs):
+    """FeatureEncoder over the synthetic one-hot layout, scaler fitted on the inputs"""
+    numerical = np.array([[user_input[col] for col in NUMERICAL_COLS] for user_input in user_inputs])
+    return FeatureEncoder(one_hot_columns(), MinMaxScaler().fit(numerical))
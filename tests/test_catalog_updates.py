@@ -0,0 +1,174 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.neighbors import NearestNeighbors
+from sklearn.preprocessing import MinMaxScaler
+
+import update_catalog
+from ann_index import IVFIndex
+from feature_encoder import FeatureEncoder, NUMERICAL_COLS
+from game_recommender import (NeighbourGraph, append_feature_matrix, normalize_rows, open_feature_matrix,
+                              open_similarity_matrix, save_feature_matrix, save_similarity_matrix)
+from synthetic_catalog import make_catalog, make_user_inputs, one_hot_columns
+
+N_GAMES = 600
+N_NEW = 40
+K = 8
+
+
+def cosine_similarities(features):
+    normalized = normalize_rows(features)
+    return normalized @ normalized.T
+
+
+@pytest.fixture
+def catalog():
+    return make_catalog(N_GAMES, seed=3)
+
+
+def test_neighbour_graph_extend_matches_rebuild(catalog):
+    similarities = cosine_similarities(catalog.features)
+    graph = NeighbourGraph.from_similarity_matrix(similarities[:-N_NEW, :-N_NEW], K)
+
+    extended = graph.extend(similarities[-N_NEW:])
+    rebuilt = NeighbourGraph.from_similarity_matrix(similarities, K)
+
+    np.testing.assert_array_equal(extended.indptr, rebuilt.indptr)
+    np.testing.assert_array_equal(extended.indices, rebuilt.indices)
+    np.testing.assert_allclose(extended.scores, rebuilt.scores, rtol=1e-6)
+
+
+def test_neighbour_graph_remove_matches_rebuild(catalog):
+    similarities = cosine_similarities(catalog.features)
+    keep = np.arange(N_GAMES) % 7 != 0
+    graph, short_rows = NeighbourGraph.from_similarity_matrix(similarities, K).remove(keep)
+
+    # Refill the lists that lost a neighbour, as remove_games does
+    kept_similarities = similarities[keep][:, keep]
+    rebuilt = NeighbourGraph.from_similarity_matrix(kept_similarities, K)
+    graph = graph.replace_rows(short_rows, rebuilt.indices.reshape(-1, K)[short_rows],
+                               rebuilt.scores.reshape(-1, K)[short_rows])
+
+    np.testing.assert_array_equal(graph.indptr, rebuilt.indptr)
+    np.testing.assert_array_equal(graph.indices, rebuilt.indices)
+    np.testing.assert_allclose(graph.scores, rebuilt.scores, rtol=1e-6)
+
+
+def test_append_feature_matrix_matches_rebuild(catalog, tmp_path):
+    path = str(tmp_path / 'game_features.npy')
+    base = catalog._replace(features=catalog.features[:-N_NEW], names=catalog.names[:-N_NEW])
+    save_feature_matrix(base, path)
+    inode = os.stat(path).st_ino
+
+    append_feature_matrix(path, catalog.features[-N_NEW:], catalog.names[-N_NEW:])
+
+    appended = open_feature_matrix(path)
+    assert os.stat(path).st_ino == inode
+    np.testing.assert_array_equal(appended.features, catalog.features)
+    assert appended.names == catalog.names
+    assert appended.columns == catalog.columns
+
+
+@pytest.mark.parametrize('metric', ['euclidean', 'cosine'])
+def test_ivf_index_add_and_remove_match_rebuild(catalog, metric):
+    index = IVFIndex.build(catalog.features[:-N_NEW], n_lists=12, metric=metric, n_probe=12)
+    queries = catalog.features[:25]
+
+    added = index.add(catalog.features[-N_NEW:])
+    # Probing every list is an exact search, as is a single-list index
+    assert added.n_rows == N_GAMES
+    _assert_same_search(added, IVFIndex.build(catalog.features, n_lists=1, metric=metric), queries)
+
+    keep = np.arange(N_GAMES) % 5 != 0
+    removed = added.remove(keep)
+    assert removed.n_rows == keep.sum()
+    _assert_same_search(removed, IVFIndex.build(catalog.features[keep], n_lists=1, metric=metric), queries)
+
+
+def _assert_same_search(index, reference, queries):
+    indices, scores = index.search(queries, K, n_probe=index.n_lists)
+    expected_indices, expected_scores = reference.search(queries, K, n_probe=reference.n_lists)
+    np.testing.assert_array_equal(indices, expected_indices)
+    np.testing.assert_allclose(scores, expected_scores, rtol=1e-5, atol=1e-6)
+
+
+def write_models(models_dir, user_inputs):
+    """Model artifacts for the catalog of user_inputs, as the update tool expects them"""
+    numerical = np.array([[user_input[col] for col in NUMERICAL_COLS] for user_input in user_inputs])
+    scaler = MinMaxScaler().fit(numerical)
+    encoder = FeatureEncoder(one_hot_columns(), scaler)
+    features = encoder.encode_many(user_inputs)
+    names = [user_input['Name'] for user_input in user_inputs]
+    catalog = make_catalog(1)._replace(features=features, names=names)
+
+    joblib.dump(one_hot_columns(), os.path.join(models_dir, 'one_hot_columns.pkl'))
+    joblib.dump(scaler, os.path.join(models_dir, 'minmax_scaler.pkl'))
+    joblib.dump(names, os.path.join(models_dir, 'game_names.pkl'))
+    joblib.dump(NearestNeighbors(algorithm='brute').fit(features),
+                os.path.join(models_dir, 'game_recommender_knn_model.pkl'))
+    save_feature_matrix(catalog, os.path.join(models_dir, 'game_features.npy'))
+    similarities = cosine_similarities(features)
+    save_similarity_matrix(similarities, os.path.join(models_dir, 'cosine_sim_matrix.npy'))
+    NeighbourGraph.from_similarity_matrix(similarities, K).save(os.path.join(models_dir, 'cosine_topk_graph.npz'))
+    IVFIndex.build(features, n_lists=8).save(os.path.join(models_dir, 'ann_index.npz'))
+    return encoder
+
+
+def snapshot(models_dir):
+    return {name: open(os.path.join(models_dir, name), 'rb').read() for name in sorted(os.listdir(models_dir))}
+
+
+@pytest.fixture
+def models_dir(tmp_path):
+    user_inputs = make_user_inputs(N_GAMES + N_NEW, seed=5)
+    base_dir = tmp_path / 'models'
+    base_dir.mkdir()
+    write_models(str(base_dir), user_inputs[:N_GAMES])
+    return str(base_dir), pd.DataFrame(user_inputs[N_GAMES:])
+
+
+def test_add_games_matches_rebuild(models_dir):
+    models, new_games = models_dir
+    update_catalog.add_games(models, new_games)
+
+    catalog = open_feature_matrix(os.path.join(models, 'game_features.npy'))
+    assert len(catalog.names) == N_GAMES + N_NEW
+    assert joblib.load(os.path.join(models, 'game_names.pkl')) == catalog.names
+    assert joblib.load(os.path.join(models, 'game_recommender_knn_model.pkl')).n_samples_fit_ == N_GAMES + N_NEW
+
+    similarities = cosine_similarities(np.asarray(catalog.features))
+    np.testing.assert_allclose(open_similarity_matrix(os.path.join(models, 'cosine_sim_matrix.npy')),
+                               similarities, atol=1e-6)
+    graph = NeighbourGraph.load(os.path.join(models, 'cosine_topk_graph.npz'))
+    np.testing.assert_array_equal(graph.indices, NeighbourGraph.from_similarity_matrix(similarities, K).indices)
+    assert IVFIndex.load(os.path.join(models, 'ann_index.npz')).n_rows == N_GAMES + N_NEW
+
+
+def test_add_games_rejects_missing_values_without_writing(models_dir):
+    models, new_games = models_dir
+    before = snapshot(models)
+    new_games.loc[3, 'User_Score'] = np.nan
+
+    with pytest.raises(ValueError, match=new_games.loc[3, 'Name']):
+        update_catalog.add_games(models, new_games)
+    assert snapshot(models) == before
+
+
+def test_failed_update_leaves_artifacts_intact(models_dir, monkeypatch):
+    models, new_games = models_dir
+    before = snapshot(models)
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+    monkeypatch.setattr(update_catalog, 'stage_feature_append', fail)
+    with pytest.raises(OSError):
+        update_catalog.add_games(models, new_games)
+    assert snapshot(models) == before
+
+    monkeypatch.setattr(update_catalog, 'stage_feature_matrix', fail)
+    with pytest.raises(OSError):
+        update_catalog.remove_games(models, ['Custom Game 7'])
+    assert snapshot(models) == before
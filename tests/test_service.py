@@ -0,0 +1,78 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from service import RecommendationService, Server, load_synthetic, make_handler
+from synthetic_catalog import make_user_inputs
+
+
+@pytest.fixture(scope='module')
+def service():
+    # A long wait so concurrent submissions share one batch
+    return RecommendationService(load_synthetic(2000, max_dense=2000), max_wait=0.2)
+
+
+@pytest.fixture(scope='module')
+def url(service):
+    server = Server(('127.0.0.1', 0), make_handler(service))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def post(url, path, body):
+    data = body if isinstance(body, bytes) else json.dumps(body).encode()
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url + path, data=data, method='POST')) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+@pytest.mark.parametrize('model', ['knn', 'cosine'])
+@pytest.mark.parametrize('bad_value', [float('nan'), float('inf'), 1e308, True, '1.0'])
+def test_bad_features_do_not_fail_the_batch(service, model, bad_value):
+    user_inputs = make_user_inputs(4, seed=1)
+    user_inputs[0]['NA_Sales'] = bad_value
+
+    with ThreadPoolExecutor(len(user_inputs)) as executor:
+        futures = [executor.submit(service.recommend_features, user_input, 5, model) for user_input in user_inputs]
+    with pytest.raises(ValueError):
+        futures[0].result()
+    for future in futures[1:]:
+        recommendations = future.result()
+        assert len(recommendations) == 5
+        assert all(score == score for _, score, _ in recommendations)
+
+
+def test_unknown_game_does_not_fail_the_batch(service):
+    games = ['Game 1', 'No Such Game', 'Game 2']
+    with ThreadPoolExecutor(len(games)) as executor:
+        futures = [executor.submit(service.recommend_game, game, 3) for game in games]
+    with pytest.raises(LookupError):
+        futures[1].result()
+    assert len(futures[0].result()) == len(futures[2].result()) == 3
+
+
+def test_http_rejects_non_finite_numbers(url):
+    features = make_user_inputs(1, seed=2)[0]
+    body = json.dumps({'features': features, 'model': 'cosine'}).replace(
+        json.dumps(features['NA_Sales']), 'NaN', 1).encode()
+    status, payload = post(url, '/recommend/features', body)
+    assert status == 400
+
+    status, payload = post(url, '/recommend/features', {'features': features, 'model': 'cosine'})
+    assert status == 200
+    assert len(payload['recommendations']) == 5
+
+
+@pytest.mark.parametrize('n', [True, 5.9, '5', 0, 101])
+def test_http_rejects_bad_n(url, n):
+    status, payload = post(url, '/recommend/game', {'game': 'Game 1', 'n': n})
+    assert status == 400
+    assert 'n must be' in payload['error']
@@ -0,0 +1,125 @@
+import sqlite3
+from contextlib import closing, contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+
+from visit_log import VisitLogWriter, create_sqlite_tables, sqlite_connection
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / 'visits.db')
+    create_sqlite_tables(path)
+    return path
+
+
+def query(path, sql):
+    with closing(sqlite3.connect(path)) as conn, conn:
+        return conn.execute(sql).fetchall()
+
+
+def make_writer(db, **kwargs):
+    return VisitLogWriter(sqlite_connection(db), placeholder='?', **kwargs)
+
+
+def counting_connection(db):
+    """sqlite_connection that counts how often a connection is opened"""
+    connection = sqlite_connection(db)
+
+    @contextmanager
+    def counted():
+        counted.opened += 1
+        with connection() as conn:
+            yield conn
+    counted.opened = 0
+    return counted
+
+
+def test_flush_writes_queued_visits_in_batches(db):
+    connection = counting_connection(db)
+    writer = VisitLogWriter(connection, placeholder='?', batch_size=3)
+    start = datetime(2024, 1, 1)
+    for i in range(10):
+        assert writer.record(start + timedelta(seconds=i))
+
+    assert writer.flush() == 10
+    # Four batches of at most 3, then one read of the total
+    assert connection.opened == 5
+    assert writer.pending == 0
+    assert writer.written == 10
+    timestamps = [row[0] for row in query(db, "SELECT Timestamp FROM Visitor ORDER BY Visitor_number")]
+    assert timestamps == [(start + timedelta(seconds=i)).strftime('%Y-%m-%d %H:%M:%S') for i in range(10)]
+    assert query(db, "SELECT Total FROM VisitorCounter WHERE Id = 1") == [(10,)]
+
+
+def test_record_drops_visits_when_the_queue_is_full(db):
+    writer = make_writer(db, max_pending=5)
+    accepted = [writer.record() for _ in range(8)]
+
+    assert accepted == [True] * 5 + [False] * 3
+    assert writer.pending == 5
+    assert writer.dropped == 3
+    assert writer.flush() == 5
+    assert query(db, "SELECT COUNT(*) FROM Visitor") == [(5,)]
+
+
+def test_failed_flush_requeues_the_batch(db):
+    writer = make_writer(db, batch_size=4)
+    start = datetime(2024, 1, 1)
+    for i in range(6):
+        writer.record(start + timedelta(minutes=i))
+    query(db, "ALTER TABLE Visitor RENAME TO Visitor_moved")
+
+    assert writer.flush() == 0
+    assert writer.failures == 1
+    assert writer.pending == 6
+    assert writer.dropped == 0
+
+    query(db, "ALTER TABLE Visitor_moved RENAME TO Visitor")
+    assert writer.flush() == 6
+    timestamps = [row[0] for row in query(db, "SELECT Timestamp FROM Visitor ORDER BY Visitor_number")]
+    assert timestamps == [(start + timedelta(minutes=i)).strftime('%Y-%m-%d %H:%M:%S') for i in range(6)]
+    assert query(db, "SELECT Total FROM VisitorCounter WHERE Id = 1") == [(6,)]
+
+
+def test_requeue_keeps_the_queue_bounded(db):
+    writer = make_writer(db, max_pending=4, batch_size=4)
+    for _ in range(4):
+        writer.record()
+
+    # The failed batch is put back while new visits keep arriving
+    batch = [writer._pending.popleft() for _ in range(4)]
+    writer.record()
+    writer._requeue(batch)
+    assert writer.pending == 4
+    assert writer.dropped == 1
+
+
+def test_close_drains_the_queue(db):
+    writer = make_writer(db, interval=60).start()
+    writer.flush()
+    for _ in range(7):
+        writer.record()
+
+    writer.close()
+    assert not writer._thread.is_alive()
+    assert writer.pending == 0
+    assert query(db, "SELECT COUNT(*) FROM Visitor") == [(7,)]
+
+
+def test_visitor_count_after_n_visits(db):
+    query(db, "INSERT INTO Visitor (Timestamp) VALUES ('2023-12-31 00:00:00')")
+    query(db, "UPDATE VisitorCounter SET Total = 1 WHERE Id = 1")
+    writer = make_writer(db, batch_size=2)
+    assert writer.visitor_count() is None
+
+    writer.flush()
+    assert writer.visitor_count() == 1
+    for _ in range(5):
+        writer.record()
+    # Queued visits are counted before they are written
+    assert writer.visitor_count() == 6
+    writer.flush()
+    assert writer.visitor_count() == 6
+    assert query(db, "SELECT Total FROM VisitorCounter WHERE Id = 1") == [(6,)]
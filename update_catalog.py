@@ -0,0 +1,220 @@
+"""Add or remove games in the model artifacts without a full rebuild.
+
+Works on a local copy of the artifacts (upload the directory afterwards).
+New games are given as rows in the games.csv format and encoded with the
+fitted scaler and one-hot columns; only their similarities to the catalog
+are computed. Each artifact that exists in --models is updated:
+
+    game_features.npy/.json      new rows appended in place (rewritten on removal)
+    cosine_topk_graph.npz        new rows added, affected rows updated
+    cosine_sim_matrix.npy/.pkl   grown by the new rows and columns (existing entries copied)
+    ann_index.npz                new rows filed into the existing lists
+    game_recommender_knn_model.pkl, game_names.pkl   refitted / rewritten
+
+    python update_catalog.py --models models --add new_games.csv --games-csv data/games.csv
+    python update_catalog.py --models models --remove "Old Game" "Another Game"
+"""
+import argparse
+import logging
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+
+from ann_index import IVFIndex
+from feature_encoder import FeatureEncoder, NUMERICAL_COLS
+from game_recommender import (NeighbourGraph, extend_similarity_matrix, normalize_rows, open_feature_matrix,
+                              shrink_similarity_matrix, stage_feature_append, stage_feature_matrix,
+                              stage_similarity_update, staged_replace, top_k)
+
+logger = logging.getLogger(__name__)
+
+INPUT_COLS = ['Name', 'Platform', 'Year_of_Release', 'Genre', 'Publisher', 'Rating'] + NUMERICAL_COLS
+
+
+def encode_games(frame, models_dir):
+    """Encode games.csv-style rows with the fitted scaler and one-hot columns.
+
+    Raises ValueError for rows with a missing or non-finite numeric value
+    (e.g. no User_Score), since they cannot be placed in the catalog.
+    """
+    missing = [col for col in INPUT_COLS if col not in frame.columns]
+    if missing:
+        raise ValueError(f"New games are missing columns: {missing}")
+    encoder = FeatureEncoder(joblib.load(os.path.join(models_dir, 'one_hot_columns.pkl')),
+                             joblib.load(os.path.join(models_dir, 'minmax_scaler.pkl')))
+    user_inputs = []
+    for row in frame[INPUT_COLS].to_dict('records'):
+        # games.csv stores the year as a float; the one-hot columns use ints
+        if pd.notna(row['Year_of_Release']):
+            row['Year_of_Release'] = int(row['Year_of_Release'])
+        user_inputs.append(row)
+    new = encoder.encode_many(user_inputs)
+    if not np.isfinite(new).all():
+        bad = ~np.isfinite(new).all(axis=1)
+        raise ValueError(f"New games have missing or non-finite values in {NUMERICAL_COLS}: "
+                         f"{frame['Name'].to_numpy()[bad].tolist()}")
+    return new
+
+
+def _path(models_dir, name):
+    path = os.path.join(models_dir, name)
+    return path if os.path.exists(path) else None
+
+
+class Staging:
+    """Updated artifacts, written aside and published together.
+
+    Every output is written next to its target first; only when all of them
+    (including the knn refit) have succeeded are they swapped in, so a
+    failure part way through leaves the previous artifact set intact.
+    """
+
+    def __init__(self):
+        self.pending = []
+
+    def add(self, pending):
+        self.pending.append(pending)
+
+    def save(self, obj, path, save):
+        self.add(staged_replace(path, lambda tmp_path: save(obj, tmp_path)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            for pending in self.pending:
+                pending.rollback()
+            return False
+        for pending in self.pending:
+            pending.commit()
+        return False
+
+
+def add_games(models_dir, frame, block_size=4096):
+    features_path = os.path.join(models_dir, 'game_features.npy')
+    catalog = open_feature_matrix(features_path)
+    n = len(catalog.names)
+    new = encode_games(frame, models_dir).astype(catalog.features.dtype)
+    names = frame['Name'].tolist()
+
+    # Similarities of the new games to the grown catalog, computed once
+    normalized = normalize_rows(catalog.features)
+    new_normalized = normalize_rows(new)
+    new_similarities = new_normalized @ np.concatenate([normalized, new_normalized]).T
+    del normalized
+
+    with Staging() as staging:
+        if _path(models_dir, 'cosine_topk_graph.npz'):
+            path = _path(models_dir, 'cosine_topk_graph.npz')
+            staging.save(NeighbourGraph.load(path).extend(new_similarities), path, lambda graph, p: graph.save(p))
+            logger.info("Added %d rows to %s", len(names), path)
+        if _path(models_dir, 'cosine_sim_matrix.npy'):
+            staging.add(stage_similarity_update(_path(models_dir, 'cosine_sim_matrix.npy'),
+                                                new_similarities=new_similarities))
+            logger.info("Grew cosine_sim_matrix.npy to %d games", n + len(names))
+        if _path(models_dir, 'cosine_sim_matrix.pkl'):
+            path = _path(models_dir, 'cosine_sim_matrix.pkl')
+            matrix = joblib.load(path)
+            staging.save(extend_similarity_matrix(matrix, new_similarities.astype(matrix.dtype),
+                                                  block_size=block_size), path, joblib.dump)
+            del matrix
+            logger.info("Grew cosine_sim_matrix.pkl to %d games", n + len(names))
+        if _path(models_dir, 'ann_index.npz'):
+            path = _path(models_dir, 'ann_index.npz')
+            staging.save(IVFIndex.load(path).add(new), path, lambda index, p: index.save(p))
+            logger.info("Added %d rows to %s", len(names), path)
+
+        _refit_knn(models_dir, staging, np.concatenate([catalog.features, new]), catalog.names + names)
+        del catalog
+        staging.add(stage_feature_append(features_path, new, names))
+
+
+def remove_games(models_dir, game_names, block_size=4096):
+    features_path = os.path.join(models_dir, 'game_features.npy')
+    catalog = open_feature_matrix(features_path)
+    game_names = set(game_names)
+    missing = game_names - set(catalog.names)
+    if missing:
+        raise ValueError(f"Games not found in the catalog: {sorted(missing)}")
+    keep = np.array([name not in game_names for name in catalog.names], dtype=bool)
+    logger.info("Removing %d rows", int((~keep).sum()))
+
+    with Staging() as staging:
+        if _path(models_dir, 'cosine_topk_graph.npz'):
+            path = _path(models_dir, 'cosine_topk_graph.npz')
+            old_graph = NeighbourGraph.load(path)
+            graph, short_rows = old_graph.remove(keep)
+            # Refill only the lists that lost a neighbour
+            normalized = normalize_rows(catalog.features[keep])
+            k = min(old_graph.k, len(normalized) - 1)
+            for start in range(0, len(short_rows), block_size):
+                rows = short_rows[start:start + block_size]
+                indices, scores = top_k(normalized[rows] @ normalized.T, k, exclude=rows)
+                graph = graph.replace_rows(rows, indices, scores)
+            staging.save(graph, path, lambda graph, p: graph.save(p))
+            logger.info("Refilled %d neighbour lists in %s", len(short_rows), path)
+        if _path(models_dir, 'cosine_sim_matrix.npy'):
+            staging.add(stage_similarity_update(_path(models_dir, 'cosine_sim_matrix.npy'), keep=keep))
+        if _path(models_dir, 'cosine_sim_matrix.pkl'):
+            path = _path(models_dir, 'cosine_sim_matrix.pkl')
+            staging.save(shrink_similarity_matrix(joblib.load(path), keep, block_size=block_size), path,
+                         joblib.dump)
+        if _path(models_dir, 'ann_index.npz'):
+            path = _path(models_dir, 'ann_index.npz')
+            staging.save(IVFIndex.load(path).remove(keep), path, lambda index, p: index.save(p))
+
+        kept = catalog._replace(features=np.asarray(catalog.features[keep]),
+                                names=[name for name, kept in zip(catalog.names, keep) if kept])
+        del catalog
+        _refit_knn(models_dir, staging, kept.features, kept.names)
+        staging.add(stage_feature_matrix(kept, features_path))
+
+
+def _refit_knn(models_dir, staging, features, names):
+    """Stage the knn model refitted on the updated features, and game_names.pkl"""
+    if _path(models_dir, 'game_recommender_knn_model.pkl'):
+        path = _path(models_dir, 'game_recommender_knn_model.pkl')
+        staging.save(clone(joblib.load(path)).fit(np.asarray(features)), path, joblib.dump)
+    if _path(models_dir, 'game_names.pkl'):
+        staging.save(list(names), _path(models_dir, 'game_names.pkl'), joblib.dump)
+    logger.info("Catalog now has %d games", len(names))
+
+
+def update_games_csv(path, added=None, removed=None):
+    """Keep the complete game table (shown on the Recommend page) in step"""
+    games = pd.read_csv(path)
+    if removed:
+        games = games[~games['Name'].isin(removed)]
+    if added is not None:
+        games = pd.concat([games, added.reindex(columns=games.columns)], ignore_index=True)
+    staged_replace(path, lambda tmp_path: games.to_csv(tmp_path, index=False)).commit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--models', default='models', help="Directory holding the model artifacts")
+    parser.add_argument('--add', help="CSV of new games, in the games.csv format")
+    parser.add_argument('--remove', nargs='*', default=[], help="Titles to remove (every platform)")
+    parser.add_argument('--games-csv', help="Also update this complete game table")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    if not os.path.exists(os.path.join(args.models, 'game_features.npy')):
+        parser.error("Incremental updates need models/game_features.npy; convert the processed "
+                     "DataFrame with save_feature_matrix first.")
+
+    added = pd.read_csv(args.add) if args.add else None
+    if args.remove:
+        remove_games(args.models, args.remove)
+    if added is not None:
+        add_games(args.models, added)
+    if args.games_csv:
+        update_games_csv(args.games_csv, added, args.remove)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import atexit
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import closing, contextmanager
+from datetime import datetime
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class VisitLogWriter:
+    """Write-behind logger for visitor events.
+
+    ``record`` only appends a timestamp to an in-memory queue; a background
+    thread flushes the queue every ``interval`` seconds as one multi-row
+    INSERT plus a single update of the VisitorCounter total, and refreshes
+    the total it reports. The queue holds at most ``max_pending`` events
+    (newer events are dropped and counted when it is full), so a slow or
+    unavailable database never blocks callers or grows memory without bound.
+    ``close`` drains what is left; it also runs at interpreter exit.
+
+    ``connection`` is a callable returning a context manager that yields a
+    DB-API connection, e.g. ``ConnectionPool.connection`` for MySQL or
+    ``sqlite_connection(path)`` for a local SQLite stand-in (use
+    ``placeholder='?'`` with SQLite). ``prepare``, if given, is called with
+    a connection on the background thread before the first flush, e.g. to
+    create tables.
+    """
+
+    def __init__(self, connection, placeholder='%s', interval=2.0, max_pending=10000, batch_size=500,
+                 refresh_interval=60.0, prepare=None):
+        self._connection = connection
+        self._prepare = prepare
+        self.insert_sql = f"INSERT INTO Visitor (Timestamp) VALUES ({placeholder})"
+        self.interval = interval
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.refresh_interval = refresh_interval
+
+        self.total = None
+        self.written = 0
+        self.dropped = 0
+        self.failures = 0
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refreshed = 0.0
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='visit-log-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+        return self
+
+    def record(self, timestamp=None):
+        """Queue one visit; never touches the database"""
+        timestamp = (timestamp or datetime.now()).strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return False
+            self._pending.append(timestamp)
+            return True
+
+    @property
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def visitor_count(self):
+        """Last total read from the database plus visits not yet written.
+
+        None until the first read has completed.
+        """
+        with self._lock:
+            if self.total is None:
+                return None
+            return self.total + len(self._pending)
+
+    def _run(self):
+        self.flush()
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        """Write every queued visit in batches; returns the number written"""
+        written = 0
+        with self._flush_lock:
+            if self._prepare is not None:
+                try:
+                    with metrics.span('mysql_seconds', op='prepare'), self._connection() as conn:
+                        self._prepare(conn)
+                    self._prepare = None
+                except Exception:
+                    logger.exception("Failed to prepare the visitor tables")
+                    self._failed('prepare')
+                    return written
+
+            while True:
+                with self._lock:
+                    batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                if not batch:
+                    break
+                try:
+                    self._write(batch)
+                except Exception:
+                    logger.exception("Failed to write %d visits", len(batch))
+                    self._failed('write')
+                    self._requeue(batch)
+                    return written
+                written += len(batch)
+
+            if written or time.monotonic() - self._refreshed >= self.refresh_interval:
+                try:
+                    self._refresh_total()
+                except Exception:
+                    logger.exception("Failed to read the visitor total")
+                    self._failed('refresh')
+        return written
+
+    def _failed(self, op):
+        self.failures += 1
+        metrics.increment('mysql_errors_total', op=op)
+
+    def _write(self, batch):
+        with metrics.span('mysql_seconds', op='write'), self._connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.executemany(self.insert_sql, [(timestamp,) for timestamp in batch])
+                cursor.execute(f"UPDATE VisitorCounter SET Total = Total + {len(batch)} WHERE Id = 1")
+            finally:
+                cursor.close()
+            conn.commit()
+        with self._lock:
+            self.written += len(batch)
+            # Keep the reported count moving without waiting for a refresh
+            if self.total is not None:
+                self.total += len(batch)
+
+    def _refresh_total(self):
+        with metrics.span('mysql_seconds', op='refresh'), self._connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT Total FROM VisitorCounter WHERE Id = 1")
+                row = cursor.fetchone()
+            finally:
+                cursor.close()
+        with self._lock:
+            self.total = row[0] if row else 0
+        self._refreshed = time.monotonic()
+
+    def _requeue(self, batch):
+        """Put a failed batch back at the front, within the memory bound"""
+        with self._lock:
+            room = self.max_pending - len(self._pending)
+            keep = batch[len(batch) - room:] if room < len(batch) else batch
+            self.dropped += len(batch) - len(keep)
+            self._pending.extendleft(reversed(keep))
+
+    def close(self, timeout=10.0):
+        """Stop the background thread and write what is still queued"""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self.flush()
+
+
+def sqlite_connection(path):
+    """Connection factory for a local SQLite stand-in of the visitor tables"""
+    @contextmanager
+    def connection():
+        with closing(sqlite3.connect(path)) as conn:
+            yield conn
+    return connection
+
+
+def create_sqlite_tables(path):
+    """Create the Visitor and VisitorCounter tables in a SQLite database"""
+    with closing(sqlite3.connect(path)) as conn:
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS Visitor (
+            Visitor_number INTEGER PRIMARY KEY AUTOINCREMENT,
+            Timestamp TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        conn.execute("CREATE TABLE IF NOT EXISTS VisitorCounter (Id INTEGER PRIMARY KEY, Total INTEGER NOT NULL)")
+        conn.execute("INSERT OR IGNORE INTO VisitorCounter (Id, Total) SELECT 1, COUNT(*) FROM Visitor")
+        conn.commit()